@@ -29,6 +29,8 @@ from .operators_import import (
     SCENE_OT_Tree_Clipper_Import_File_Prepare,
     SCENE_OT_Tree_Clipper_Import_Clipboard_Prepare,
     SCENE_OT_Tree_Clipper_Import_Modal,
+    SCENE_OT_Tree_Clipper_Import_Wait,
+    SCENE_OT_Tree_Clipper_Import_Wait_Cancel,
 )
 
 from .panel import SCENE_PT_Tree_Clipper_Panel
@@ -45,6 +47,8 @@ classes = [
     Tree_Clipper_External_Import_Items,
     SCENE_UL_Tree_Clipper_External_Import_List,
     SCENE_OT_Tree_Clipper_Import_Modal,
+    SCENE_OT_Tree_Clipper_Import_Wait,
+    SCENE_OT_Tree_Clipper_Import_Wait_Cancel,
     SCENE_OT_Tree_Clipper_Import_Cache,
     SCENE_OT_Tree_Clipper_Import_File_Prepare,
     SCENE_OT_Tree_Clipper_Import_Clipboard_Prepare,
@@ -0,0 +1,174 @@
+import bpy
+
+from array import array
+from typing import Any, TYPE_CHECKING
+
+from .common import (
+    DATA,
+    DEFAULT_VALUE,
+    DIMENSIONS,
+    PROP_TYPE_BOOLEAN,
+    PROP_TYPE_FLOAT,
+    PROP_TYPE_INT,
+    SIMPLE_DATA_TYPE,
+    FromRoot,
+)
+from .property_plans import PropertyPlan
+
+if TYPE_CHECKING:
+    from .export_nodes import Exporter
+
+# reading a handful of items one by one is just as fast
+MIN_BULK_ITEMS = 4
+
+# https://github.com/Algebraic-UG/tree_clipper/issues/132
+_UNCLAMPED_SOCKET = "Subsurface IOR"
+
+
+class _Column:
+    """One property of all items, flat, with whether anything is out of range"""
+
+    __slots__ = ("values", "width", "out_of_range")
+
+    def __init__(self, values: array | list, width: int, out_of_range: bool) -> None:
+        self.values = values
+        self.width = width
+        self.out_of_range = out_of_range
+
+
+def _new_buffer(prop: PropertyPlan, size: int) -> array | list:
+    if prop.type == PROP_TYPE_FLOAT:
+        return array("f", bytes(4 * size))
+    if prop.type == PROP_TYPE_INT:
+        return array("i", bytes(4 * size))
+    # there is no array type code for bool
+    return [False] * size
+
+
+def item_type(
+    elements: list[bpy.types.bpy_struct], fixed_type: bpy.types.bpy_struct | None
+) -> bpy.types.bpy_struct | None:
+    """The type whose properties all elements have with the same length:
+    the only type the elements have, or otherwise the collection's item type"""
+    first_type = elements[0].bl_rna.identifier
+    if all(element.bl_rna.identifier == first_type for element in elements):
+        return elements[0]
+    return fixed_type
+
+
+class BulkColumns:
+    """The numeric properties of a whole collection, read with one foreach_get each.
+    Only properties that every item has with the same length are read this way, see item_type."""
+
+    def __init__(
+        self,
+        exporter: "Exporter",
+        collection: bpy.types.bpy_prop_collection,
+        item_type: bpy.types.bpy_struct,
+    ) -> None:
+        self.columns: dict[str, _Column] = {}
+
+        count = len(collection)
+        plans = exporter.plans.of_struct(item_type)
+        has_dimensions = DIMENSIONS in plans
+        for prop in plans.values():
+            if prop.flat_length is None or prop.is_readonly or prop.is_forbidden:
+                continue
+            # the length depends on the dimensions, see Exporter._export_property_simple
+            if has_dimensions and prop.identifier == DEFAULT_VALUE:
+                continue
+
+            values = _new_buffer(prop, count * prop.flat_length)
+            try:
+                collection.foreach_get(prop.identifier, values)
+            except (AttributeError, RuntimeError, TypeError):
+                # some items don't have it after all, read them one by one
+                continue
+
+            out_of_range = False
+            if prop.type != PROP_TYPE_BOOLEAN and values:
+                assert prop.hard_min is not None and prop.hard_max is not None
+                out_of_range = min(values) < prop.hard_min or max(values) > prop.hard_max
+
+            self.columns[prop.identifier] = _Column(values, prop.flat_length, out_of_range)
+
+    def has(self, identifier: str) -> bool:
+        return identifier in self.columns
+
+    def value(
+        self,
+        *,
+        exporter: "Exporter",
+        obj: bpy.types.bpy_struct,
+        row: int,
+        prop: PropertyPlan,
+        from_root: FromRoot,
+    ) -> SIMPLE_DATA_TYPE:
+        column = self.columns[prop.identifier]
+        start = row * column.width
+        values = column.values[start : start + column.width]
+
+        if column.out_of_range and not (
+            isinstance(obj, bpy.types.NodeSocket)
+            and prop.identifier == DEFAULT_VALUE
+            and obj.name == _UNCLAMPED_SOCKET
+        ):
+            hard_min = prop.hard_min
+            hard_max = prop.hard_max
+            assert hard_min is not None and hard_max is not None
+            if min(values) < hard_min or max(values) > hard_max:
+                for value in values:
+                    if value < hard_min or value > hard_max:
+                        warning = f"{from_root.to_str()}: outside of valid range"
+                        exporter.report.warnings.append(warning)
+                        if exporter.debug_prints:
+                            print(warning)
+                values = [max(hard_min, min(hard_max, value)) for value in values]
+
+        if prop.is_array:
+            return list(values)
+        return values[0]
+
+
+def bulk_write(
+    *,
+    plans: dict[str, PropertyPlan],
+    collection: bpy.types.bpy_prop_collection,
+    serialized_items: list[dict[str, Any]],
+) -> set[str]:
+    """Write the numeric properties that all serialized items have with one foreach_set each.
+    Only the ones in property_plans.BULK_WRITABLE, the handlers defer some others on purpose.
+    Returns the identifiers that were written, the others need to be set item by item."""
+    written = set()
+    has_dimensions = DIMENSIONS in plans
+    for prop in plans.values():
+        if not prop.is_bulk_writable:
+            continue
+        if prop.flat_length is None or prop.is_readonly or prop.is_forbidden:
+            continue
+        # these make Blender rebuild things, so they stay in the order the handlers write them
+        if prop.changes_structure:
+            continue
+        if has_dimensions and prop.identifier == DEFAULT_VALUE:
+            continue
+
+        identifier = prop.identifier
+        values = []
+        for item in serialized_items:
+            value = item[DATA].get(identifier)
+            if value is None:
+                break
+            if prop.is_array:
+                if len(value) != prop.flat_length:
+                    break
+                values.extend(value)
+            else:
+                values.append(value)
+        else:
+            try:
+                collection.foreach_set(identifier, values)
+            except (AttributeError, RuntimeError, TypeError):
+                # some items don't have it after all, write them one by one
+                continue
+            written.add(identifier)
+    return written
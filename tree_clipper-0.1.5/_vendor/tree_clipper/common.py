@@ -4,6 +4,7 @@ from types import NoneType
 from typing import Any, Callable, TYPE_CHECKING
 from pathlib import Path
 import tempfile
+import time
 
 
 if TYPE_CHECKING:
@@ -18,6 +19,7 @@ MATERIAL_NAME = "name"
 TREES = "node_trees"
 EXTERNAL = "external"
 SCENES = "scenes"
+TREE_SPANS = "node_tree_spans"  # optional, where each tree is in the text, see lazy_payload
 
 # within each external item
 EXTERNAL_DESCRIPTION = "description"
@@ -57,7 +59,12 @@ SIMPLE_PROPERTY_TYPES_AS_STRS = set(
     ]
 )
 NODE_TREE = "node_tree"
+NODE_TREE_LINKS = "links"
+NODE_TREE_NODES = "nodes"
 DIMENSIONS = "dimensions"
+LOCATION = "location"
+INPUTS = "inputs"
+OUTPUTS = "outputs"
 
 
 # bl_* properties can be dangerous to set
@@ -86,15 +93,74 @@ def no_clobber(data: dict, key: str | int, value) -> None:
     data[key] = value
 
 
+def _item_name(item: Any) -> str:
+    # serialized items on import, bpy structs on export
+    if isinstance(item, dict):
+        return item[DATA].get(NAME, "unnamed")
+    try:
+        return getattr(item, NAME, "unnamed")
+    except ReferenceError:
+        # the path might be shown long after the item was removed
+        return "removed"
+
+
 class FromRoot:
-    def __init__(self, path: list) -> None:
-        self.path = path
+    """A path from the root to the current object, for debugging and error messages.
+    Every node only links to its parent and keeps the raw pieces,
+    the strings are only built if someone actually looks at them."""
+
+    __slots__ = ("parent", "piece", "prop", "index", "item")
+
+    def __init__(
+        self,
+        path: list | None = None,
+        *,
+        parent: "FromRoot | None" = None,
+        piece: str | None = None,
+        prop: Any = None,
+        index: int | None = None,
+        item: Any = None,
+    ) -> None:
+        if path:
+            *rest, piece = path
+            parent = FromRoot(rest) if rest else None
+        self.parent = parent
+        self.piece = piece
+        self.prop = prop
+        self.index = index
+        self.item = item
 
     def add(self, piece: str) -> "FromRoot":
-        return FromRoot(self.path + [piece])
+        return FromRoot(parent=self, piece=piece)
 
     def add_prop(self, prop: bpy.types.Property) -> "FromRoot":
-        return self.add(f"{prop.type} ({prop.identifier})")
+        return FromRoot(parent=self, prop=prop)
+
+    def add_item(self, index: int, item: Any = None) -> "FromRoot":
+        return FromRoot(parent=self, index=index, item=item)
+
+    def _render(self) -> str | None:
+        if self.piece is not None:
+            return self.piece
+        if self.prop is not None:
+            return f"{self.prop.type} ({self.prop.identifier})"
+        if self.index is not None:
+            name = "unnamed" if self.item is None else _item_name(self.item)
+            return f"[{self.index}] ({name})"
+        # an empty root
+        return None
+
+    @property
+    def path(self) -> list[str]:
+        pieces = []
+        node = self
+        while node is not None:
+            piece = node._render()
+            if piece is not None:
+                pieces.append(piece)
+            node = node.parent
+        pieces.reverse()
+        return pieces
 
     def to_str(self) -> str:
         return str(" -> ".join(self.path))
@@ -127,6 +193,111 @@ def most_specific_type_handled(
         ty = ty.__bases__[0]
 
 
+class HandlerTable(dict):
+    """A dict of specific handlers that knows when it was changed.
+    This lets caches derived from it notice that they are stale."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.generation = 0
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.generation += 1
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self.generation += 1
+
+    def clear(self) -> None:
+        super().clear()
+        self.generation += 1
+
+    def pop(self, *args):
+        self.generation += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.generation += 1
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self.generation += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self.generation += 1
+
+
+def _handlers_generation(specific_handlers: dict[type, Callable]) -> int:
+    # plain dicts don't track changes, the size is the best guess we have
+    if isinstance(specific_handlers, HandlerTable):
+        return specific_handlers.generation
+    return len(specific_handlers)
+
+
+class HandlerDispatch:
+    """Memoizes most_specific_type_handled.
+    Python types and collection RNA identifiers are cached separately,
+    because all collections share the same Python type."""
+
+    def __init__(self, specific_handlers: dict[type, Callable]) -> None:
+        self.specific_handlers = specific_handlers
+        self.generation = _handlers_generation(specific_handlers)
+        self.by_type: dict[type, type] = {}
+        self.by_collection: dict[str, type] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, obj: bpy.types.bpy_struct) -> type:
+        generation = _handlers_generation(self.specific_handlers)
+        if generation != self.generation:
+            self.by_type.clear()
+            self.by_collection.clear()
+            self.generation = generation
+
+        if isinstance(obj, bpy.types.bpy_prop_collection):
+            cache = self.by_collection
+            key = obj.bl_rna.identifier
+        else:
+            cache = self.by_type
+            key = type(obj)
+
+        assumed_type = cache.get(key)  # ty: ignore[no-matching-overload]
+        if assumed_type is not None:
+            self.hits += 1
+            return assumed_type
+
+        self.misses += 1
+        assumed_type = most_specific_type_handled(self.specific_handlers, obj)
+        cache[key] = assumed_type  # ty: ignore[invalid-assignment]
+        return assumed_type
+
+
+class Throughput:
+    """Measures how many objects per second are processed, to estimate the time left"""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+
+    def rate(self, done: int) -> float:
+        elapsed = time.perf_counter() - self.start
+        return done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, done: int, total: int) -> float | None:
+        rate = self.rate(done)
+        if rate <= 0:
+            return None
+        return max(total - done, 0) / rate
+
+    def describe(self, done: int, total: int) -> str:
+        eta = self.eta(done, total)
+        eta_str = "?" if eta is None else f"{eta:.0f}s"
+        return f"{done}/{total} objects, {self.rate(done):.0f}/s, {eta_str} left"
+
+
 GETTER = Callable[[], bpy.types.bpy_struct]
 SERIALIZER = Callable[["Exporter", bpy.types.bpy_struct, FromRoot], dict[str, Any]]
 DESERIALIZER = Callable[["Importer", GETTER, dict, FromRoot], None]
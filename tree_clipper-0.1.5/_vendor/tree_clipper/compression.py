@@ -0,0 +1,111 @@
+import base64
+import zlib
+
+from typing import BinaryIO, TextIO
+
+from .common import MAGIC_STRING
+
+# gzip container, the same as gzip.compress produces
+_GZIP_WBITS = 31
+_COMPRESS_LEVEL = 9
+
+# don't bother the compressor with every tiny piece the JSON encoder yields
+_TEXT_BATCH_SIZE = 1 << 16
+
+# how much of the base64 text is decoded at a time
+_DECODE_CHUNK_SIZE = 1 << 18
+
+# pasted text might have been wrapped or indented somewhere along the way
+_WHITESPACE = b" \t\r\n"
+
+MAGIC_BYTES = MAGIC_STRING.encode("ascii")
+
+
+class CompressedWriter:
+    """Writes MAGIC_STRING + base64(gzip(text)) to the sink while the text is still coming in.
+    Only a small batch of text and less than three bytes of compressed data are held back."""
+
+    def __init__(self, sink: TextIO) -> None:
+        self.sink = sink
+        self.compressor = zlib.compressobj(_COMPRESS_LEVEL, zlib.DEFLATED, _GZIP_WBITS)
+
+        # base64 can only encode multiples of three bytes without padding
+        self.leftover = b""
+
+        self.batch: list[str] = []
+        self.batch_size = 0
+
+        self.sink.write(MAGIC_STRING)
+
+    def write(self, text: str) -> None:
+        self.batch.append(text)
+        self.batch_size += len(text)
+        if self.batch_size >= _TEXT_BATCH_SIZE:
+            self._compress_batch()
+
+    def _compress_batch(self) -> None:
+        if not self.batch:
+            return
+        self._encode(self.compressor.compress("".join(self.batch).encode("utf-8")))
+        self.batch.clear()
+        self.batch_size = 0
+
+    def _encode(self, data: bytes) -> None:
+        if self.leftover:
+            data = self.leftover + data
+        aligned = len(data) - len(data) % 3
+        if aligned:
+            self.sink.write(base64.b64encode(data[:aligned]).decode("ascii"))
+        self.leftover = data[aligned:]
+
+    def finish(self) -> None:
+        """Write everything that is held back, the sink stays open"""
+        self._compress_batch()
+        self._encode(self.compressor.flush())
+        self.sink.write(base64.b64encode(self.leftover).decode("ascii"))
+        self.leftover = b""
+
+    def close(self) -> None:
+        self.finish()
+        self.sink.close()
+
+
+class CompressedReader:
+    """The counterpart of CompressedWriter, takes base64(gzip(text)) piece by piece.
+    Only the decompressed bytes and less than four base64 characters are held."""
+
+    def __init__(self) -> None:
+        self.decompressor = zlib.decompressobj(_GZIP_WBITS)
+        self.decompressed = bytearray()
+
+        # base64 can only decode multiples of four characters
+        self.leftover = b""
+
+    def feed(self, data: bytes) -> None:
+        data = data.translate(None, _WHITESPACE)
+        if self.leftover:
+            data = self.leftover + data
+        aligned = len(data) - len(data) % 4
+        if aligned:
+            self.decompressed += self.decompressor.decompress(
+                base64.b64decode(data[:aligned])
+            )
+        self.leftover = data[aligned:]
+
+    def feed_str(self, string: str, start: int = 0) -> None:
+        """Feed string[start:] without copying all of it at once"""
+        for offset in range(start, len(string), _DECODE_CHUNK_SIZE):
+            self.feed(string[offset : offset + _DECODE_CHUNK_SIZE].encode("ascii"))
+
+    def feed_file(self, file: BinaryIO) -> None:
+        while chunk := file.read(_DECODE_CHUNK_SIZE):
+            self.feed(chunk)
+
+    def finish(self) -> bytearray:
+        """The decompressed text, still UTF-8 encoded"""
+        if self.leftover:
+            raise ValueError("Compressed data is truncated")
+        self.decompressed += self.decompressor.flush()
+        if not self.decompressor.eof:
+            raise ValueError("Compressed data is truncated")
+        return self.decompressed
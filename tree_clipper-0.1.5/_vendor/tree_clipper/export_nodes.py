@@ -1,11 +1,14 @@
 import bpy
 
-import base64
-import gzip
+import io
 import json
+import os
+import tempfile
+import time
+from collections import deque
 from pathlib import Path
 from types import NoneType
-from typing import Any, cast, Type, Iterator, Tuple
+from typing import Any, Callable, Type, Iterator, TextIO, Tuple
 
 from .common import (
     BLENDER_VERSION,
@@ -13,20 +16,17 @@ from .common import (
     DATA,
     DEFAULT_VALUE,
     DIMENSIONS,
-    DISPLAY_SHAPE,
     EXTERNAL_DESCRIPTION,
-    FORBIDDEN_PROPERTIES,
     ID,
-    MAGIC_STRING,
     MATERIAL_NAME,
-    SIMPLE_PROPERTY_TYPES_AS_STRS,
     SERIALIZER,
     SIMPLE_DATA_TYPE,
-    SIMPLE_PROP_TYPE,
     TREE_CLIPPER_VERSION,
     TREES,
+    TREE_SPANS,
     FromRoot,
-    most_specific_type_handled,
+    HandlerDispatch,
+    Throughput,
     no_clobber,
     EXTERNAL_SERIALIZATION,
     PROP_TYPE_BOOLEAN,
@@ -35,11 +35,9 @@ from .common import (
     PROP_TYPE_ENUM,
     PROP_TYPE_POINTER,
     PROP_TYPE_COLLECTION,
-    NAME,
     ITEMS,
     BL_RNA,
     FROM_ROOT,
-    RNA_TYPE,
     EXTERNAL,
     EXTERNAL_FIXED_TYPE_NAME,
     NODE_TREE,
@@ -47,7 +45,10 @@ from .common import (
     EXTERNAL_SCENE_ID,
 )
 
-from .id_data_getter import canonical_reference
+from .bulk_arrays import MIN_BULK_ITEMS, BulkColumns, item_type
+from .compression import CompressedWriter
+from .id_data_getter import IdIndex
+from .property_plans import PropertyPlan, PropertyPlans
 from .scene_info import export_scene_info
 
 
@@ -58,6 +59,10 @@ class ExportReport:
         self.exported_trees: int = 0
         self.warnings: list[str] = []
 
+        # how often the handler lookup was answered from the cache
+        self.dispatch_hits: int = 0
+        self.dispatch_misses: int = 0
+
 
 class Pointer:
     def __init__(
@@ -97,13 +102,30 @@ class Exporter:
     ) -> None:
         self.next_id = 0
         self.specific_handlers = specific_handlers
+        self.dispatch = HandlerDispatch(specific_handlers)
         self.debug_prints = debug_prints
         self.write_from_roots = write_from_roots
         self.pointers = {}
+        # the ones that don't know their pointee_id yet
+        self.unresolved_pointers: list[tuple[bpy.types.bpy_struct, Pointer]] = []
         self.serialized = {}
         self.current_tree = None
         self.report = ExportReport()
 
+        # the schema work only needs to happen once per RNA type
+        self.plans = PropertyPlans()
+        self.serializers: dict[tuple[str, type], SERIALIZER] = {}
+
+        # canonicalizing ID references would otherwise scan bpy.data each time
+        self.id_index = IdIndex()
+
+        # the numeric properties of collection items that were read in bulk,
+        # by id() of the item while it is exported
+        self.bulk_rows: dict[int, tuple[BulkColumns, int]] = {}
+
+        # the items of the current tree are exported piece by piece, see ExportIntermediate.step
+        self.deferred: deque[Callable[[], None]] = deque()
+
     ################################################################################
     # helper functions to be used in specific handlers
     ################################################################################
@@ -116,35 +138,29 @@ class Exporter:
         from_root: FromRoot,
     ) -> dict[str, SIMPLE_DATA_TYPE]:
         data = {}
-        for prop in assumed_type.bl_rna.properties:
-            if prop.is_readonly or prop.type not in SIMPLE_PROPERTY_TYPES_AS_STRS:
-                continue
+        for prop in self.plans.simple_writable(assumed_type):
             prop_from_root = from_root.add_prop(prop)
-            if bpy.app.version == (5, 0, 0):
-                # https://github.com/Algebraic-UG/tree_clipper/issues/48
-                if (
-                    isinstance(obj, bpy.types.NodeSocket)
-                    and prop.identifier == DISPLAY_SHAPE
-                ):
-                    warning = f"{prop_from_root.to_str()}: skipping broken"
-                    self.report.warnings.append(warning)
-                    if self.debug_prints:
-                        print(warning)
-                    continue
+            # https://github.com/Algebraic-UG/tree_clipper/issues/48
+            if prop.is_broken_display_shape and isinstance(obj, bpy.types.NodeSocket):
+                warning = f"{prop_from_root.to_str()}: skipping broken"
+                self.report.warnings.append(warning)
+                if self.debug_prints:
+                    print(warning)
+                continue
 
-            if prop.identifier in FORBIDDEN_PROPERTIES:
+            if prop.is_forbidden:
                 if self.debug_prints:
                     print(f"{prop_from_root.to_str()}: forbidden")
                 continue
 
-            if prop.type in PROP_TYPE_ENUM and getattr(obj, prop.identifier) == "":
+            if prop.is_enum and getattr(obj, prop.identifier) == "":
                 if self.debug_prints:
                     print(f"{prop_from_root.to_str()}: skipping empty str enum")
                 continue
 
             data[prop.identifier] = self._export_property_simple(
                 obj=obj,
-                prop=prop,  # type: ignore
+                prop=prop,
                 from_root=prop_from_root,
             )
         return data
@@ -157,8 +173,9 @@ class Exporter:
         serialize_pointees: bool,
         from_root: FromRoot,
     ) -> dict[str, Any]:
+        plans = self.plans.of_struct(obj)
         data = {}
-        for prop in [obj.bl_rna.properties[p] for p in properties]:
+        for prop in [plans[p] for p in properties]:
             data[prop.identifier] = self._export_property(
                 obj=obj,
                 prop=prop,
@@ -167,11 +184,19 @@ class Exporter:
             )
         return data
 
+    def defer(self, work: Callable[[], None]) -> None:
+        """Run this later, but before the current tree is finished.
+        Deferred work runs in the order it was deferred."""
+        if self.current_tree is None:
+            work()
+        else:
+            self.deferred.append(work)
+
     def register_as_serialized(self, obj: bpy.types.bpy_struct) -> int:
         this_id = self.next_id
         self.next_id += 1
 
-        ref = canonical_reference(obj)
+        ref = self.id_index.canonical_reference(obj)
         if ref in self.serialized:
             raise RuntimeError("Double serialization")
         self.serialized[ref] = this_id
@@ -186,19 +211,29 @@ class Exporter:
         self,
         *,
         obj: bpy.types.bpy_struct,
-        prop: SIMPLE_PROP_TYPE,
+        prop: PropertyPlan,
         from_root: FromRoot,
     ) -> SIMPLE_DATA_TYPE:
         if self.debug_prints:
             print(f"{from_root.to_str()}: exporting simple")
 
-        assert prop.type in SIMPLE_PROPERTY_TYPES_AS_STRS
+        assert prop.is_simple
+
+        bulk_row = self.bulk_rows.get(id(obj))
+        if bulk_row is not None and bulk_row[0].has(prop.identifier):
+            return bulk_row[0].value(
+                exporter=self,
+                obj=obj,
+                row=bulk_row[1],
+                prop=prop,
+                from_root=from_root,
+            )
 
         attribute = getattr(obj, prop.identifier)
 
         # https://github.com/Algebraic-UG/tree_clipper/issues/112
         if prop.identifier == DEFAULT_VALUE and hasattr(obj, DIMENSIONS):
-            assert prop.is_array  # ty:ignore[possibly-missing-attribute]
+            assert prop.is_array
             dimensions = obj.dimensions
             if len(attribute) > dimensions:  # ty:ignore[unsupported-operator, invalid-argument-type]
                 warning = f"{from_root.to_str()}: fixing dimension mismatch"
@@ -208,18 +243,13 @@ class Exporter:
                 attribute = list(attribute)[:dimensions]
 
         if prop.type == PROP_TYPE_BOOLEAN:
-            assert isinstance(prop, bpy.types.BoolProperty)
             if prop.is_array:
                 return list(attribute)
 
         if prop.type in [PROP_TYPE_INT, PROP_TYPE_FLOAT]:
-            assert isinstance(
-                prop,
-                (
-                    bpy.types.IntProperty,
-                    bpy.types.FloatProperty,
-                ),
-            )
+            hard_min = prop.hard_min
+            hard_max = prop.hard_max
+            assert hard_min is not None and hard_max is not None
 
             # https://github.com/Algebraic-UG/tree_clipper/issues/96
             def clamp_and_report(value: int | float) -> int | float:
@@ -230,12 +260,12 @@ class Exporter:
                     and prop.identifier == DEFAULT_VALUE
                 ):
                     return value
-                if value < prop.hard_min or value > prop.hard_max:
+                if value < hard_min or value > hard_max:
                     warning = f"{from_root.to_str()}: outside of valid range"
                     self.report.warnings.append(warning)
                     if self.debug_prints:
                         print(warning)
-                return max(prop.hard_min, min(prop.hard_max, value))
+                return max(hard_min, min(hard_max, value))
 
             if prop.is_array:
                 return [clamp_and_report(value) for value in attribute]
@@ -243,8 +273,6 @@ class Exporter:
                 return clamp_and_report(attribute)  # ty:ignore[invalid-argument-type]
 
         if prop.type == PROP_TYPE_ENUM:
-            assert isinstance(prop, bpy.types.EnumProperty)
-
             if prop.is_enum_flag:
                 assert isinstance(attribute, set)
                 return list(attribute)
@@ -255,7 +283,7 @@ class Exporter:
         self,
         *,
         obj: bpy.types.bpy_struct,
-        prop: bpy.types.PointerProperty,
+        prop: PropertyPlan,
         serialize_pointee: bool,
         from_root: FromRoot,
     ) -> None | Pointer | dict[str, Any]:
@@ -274,16 +302,17 @@ class Exporter:
         if serialize_pointee:
             return self._export_obj(obj=attribute, from_root=from_root)
 
-        assert prop.fixed_type is not None
+        assert prop.fixed_type_name is not None
         pointer = Pointer(
             obj=obj,
             identifier=prop.identifier,
             pointer_id=self.next_id - 1,
-            fixed_type_name=prop.fixed_type.bl_rna.identifier,  # ty: ignore[unresolved-attribute]
+            fixed_type_name=prop.fixed_type_name,
             from_root=from_root,
         )
-        ref = canonical_reference(attribute)
+        ref = self.id_index.canonical_reference(attribute)
         self.pointers.setdefault(ref, []).append(pointer)
+        self.unresolved_pointers.append((ref, pointer))
 
         if self.debug_prints:
             print(f"{from_root.to_str()}: deferring")
@@ -293,7 +322,7 @@ class Exporter:
         self,
         *,
         obj: bpy.types.bpy_struct,
-        prop: bpy.types.CollectionProperty,
+        prop: PropertyPlan,
         from_root: FromRoot,
     ) -> dict[str, Any]:
         if self.debug_prints:
@@ -304,35 +333,98 @@ class Exporter:
         attribute = getattr(obj, prop.identifier)
 
         data = self._export_obj(obj=attribute, from_root=from_root)
-        items = [
-            self._export_obj(
-                obj=element,
-                from_root=from_root.add(
-                    f"[{i}] ({getattr(attribute[i], NAME, 'unnamed')})"
-                ),
-            )
-            for i, element in enumerate(attribute)
-        ]
+        items = []
         no_clobber(data[DATA], ITEMS, items)
 
+        elements = list(attribute)
+        bulk = self._bulk_columns(collection=attribute, prop=prop, elements=elements)
+
+        # the tree's own collections can be huge, so we don't export their items in one go
+        if obj is self.current_tree:
+            for i, element in enumerate(elements):
+                self.defer(
+                    self._make_item_work(
+                        items=items,
+                        element=element,
+                        bulk=bulk,
+                        row=i,
+                        from_root=from_root.add_item(i, element),
+                    )
+                )
+        else:
+            for i, element in enumerate(elements):
+                items.append(
+                    self._export_item(
+                        element=element,
+                        bulk=bulk,
+                        row=i,
+                        from_root=from_root.add_item(i, element),
+                    )
+                )
+
         return data
 
+    def _bulk_columns(
+        self,
+        *,
+        collection: bpy.types.bpy_prop_collection,
+        prop: PropertyPlan,
+        elements: list[bpy.types.bpy_struct],
+    ) -> BulkColumns | None:
+        if len(elements) < MIN_BULK_ITEMS or not hasattr(collection, "foreach_get"):
+            return None
+
+        bulk_type = item_type(elements, prop.fixed_type)
+        if bulk_type is None:
+            return None
+
+        return BulkColumns(self, collection, bulk_type)
+
+    def _export_item(
+        self,
+        *,
+        element: bpy.types.bpy_struct,
+        bulk: BulkColumns | None,
+        row: int,
+        from_root: FromRoot,
+    ) -> dict[str, Any]:
+        if bulk is None:
+            return self._export_obj(obj=element, from_root=from_root)
+
+        self.bulk_rows[id(element)] = (bulk, row)
+        try:
+            return self._export_obj(obj=element, from_root=from_root)
+        finally:
+            del self.bulk_rows[id(element)]
+
+    def _make_item_work(
+        self,
+        *,
+        items: list[dict[str, Any]],
+        element: bpy.types.bpy_struct,
+        bulk: BulkColumns | None,
+        row: int,
+        from_root: FromRoot,
+    ) -> Callable[[], None]:
+        return lambda: items.append(
+            self._export_item(element=element, bulk=bulk, row=row, from_root=from_root)
+        )
+
     def _export_property(
         self,
         *,
         obj: bpy.types.bpy_struct,
-        prop: bpy.types.Property,
+        prop: PropertyPlan,
         serialize_pointee: bool,
         from_root: FromRoot,
     ) -> None | SIMPLE_DATA_TYPE | Pointer | dict[str, Any]:
-        if prop.type in SIMPLE_PROPERTY_TYPES_AS_STRS:
+        if prop.is_simple:
             return self._export_property_simple(
                 obj=obj,
-                prop=prop,  # type: ignore
+                prop=prop,
                 from_root=from_root,
             )
         elif prop.type == PROP_TYPE_POINTER:
-            assert isinstance(prop, bpy.types.PointerProperty)
             return self._export_property_pointer(
                 obj=obj,
                 prop=prop,
@@ -340,7 +432,6 @@ class Exporter:
                 from_root=from_root,
             )
         elif prop.type == PROP_TYPE_COLLECTION:
-            assert isinstance(prop, bpy.types.CollectionProperty)
             return self._export_property_collection(
                 obj=obj,
                 prop=prop,
@@ -349,11 +440,28 @@ class Exporter:
         else:
             raise RuntimeError(f"Unknown property type: {prop.type}")
 
+    def _collection_needs_specific_handler(
+        self,
+        *,
+        prop: PropertyPlan,
+        attribute: bpy.types.bpy_prop_collection,
+    ) -> bool:
+        # the collection's RNA is fixed by the property, so this only needs checking once
+        if prop.collection_needs_specific_handler is None:
+            prop.collection_needs_specific_handler = (
+                hasattr(attribute, BL_RNA)
+                and any(
+                    len(func.parameters) != 0 for func in attribute.bl_rna.functions
+                )
+                and type(prop.fixed_type) not in self.specific_handlers
+            )
+        return prop.collection_needs_specific_handler
+
     def _attempt_export_property(
         self,
         *,
         obj: bpy.types.bpy_struct,
-        prop: bpy.types.Property,
+        prop: PropertyPlan,
         from_root,
     ) -> None | SIMPLE_DATA_TYPE | Pointer | dict[str, Any]:
         def error_out(reason: str):
@@ -364,12 +472,12 @@ Reason: {reason}
 From root: {from_root.to_str()}"""
             )
 
-        if prop.type in SIMPLE_PROPERTY_TYPES_AS_STRS:
+        if prop.is_simple:
             if prop.is_readonly:
                 return None
             return self._export_property_simple(
                 obj=obj,
-                prop=prop,  # type: ignore
+                prop=prop,
                 from_root=from_root,
             )
 
@@ -387,20 +495,13 @@ From root: {from_root.to_str()}"""
             )
             return self._export_property_pointer(
                 obj=obj,
-                prop=cast(bpy.types.PointerProperty, prop),
+                prop=prop,
                 serialize_pointee=serialize_pointee,
                 from_root=from_root,
             )
 
         if prop.type == PROP_TYPE_COLLECTION:
-            prop = cast(bpy.types.CollectionProperty, prop)
-            if (
-                hasattr(attribute, BL_RNA)
-                and any(
-                    len(func.parameters) != 0 for func in attribute.bl_rna.functions
-                )
-                and type(prop.fixed_type) not in self.specific_handlers
-            ):
+            if self._collection_needs_specific_handler(prop=prop, attribute=attribute):
                 error_out(
                     "collection with function that requires args and the elements aren't specifically handled"
                 )
@@ -425,7 +526,7 @@ From root: {from_root.to_str()}"""
         this_id = self.next_id
         self.next_id += 1
 
-        ref = canonical_reference(obj)
+        ref = self.id_index.canonical_reference(obj)
         if ref in self.serialized:
             raise RuntimeError(f"Double serialization: {from_root.to_str()}")
         self.serialized[ref] = this_id
@@ -438,42 +539,14 @@ From root: {from_root.to_str()}"""
             data[FROM_ROOT] = from_root.to_str()
         return data
 
-    def _export_obj(
+    def _make_serializer(
         self,
         *,
         obj: bpy.types.bpy_struct,
-        from_root: FromRoot,
-    ) -> dict[str, Any]:
-        if isinstance(obj, bpy.types.Node):
-            self.report.exported_nodes += 1
-        if isinstance(obj, bpy.types.NodeLink):
-            self.report.exported_links += 1
-        if isinstance(obj, bpy.types.NodeTree):
-            self.report.exported_trees += 1
-
-        # edge case for things like bpy_prop_collection that aren't real RNA types?
-        # https://projects.blender.org/blender/blender/issues/150092
-        if not hasattr(obj, BL_RNA):
-            assert isinstance(obj, bpy.types.bpy_prop_collection)
-            return self._export_obj_with_serializer(
-                obj=obj,
-                serializer=self.specific_handlers[NoneType],
-                from_root=from_root,
-            )
-
-        assumed_type = most_specific_type_handled(self.specific_handlers, obj)
+        assumed_type: type,
+    ) -> SERIALIZER:
         specific_handler = self.specific_handlers[assumed_type]
-        handled_prop_ids = (
-            [prop.identifier for prop in assumed_type.bl_rna.properties]  # type: ignore
-            if assumed_type is not NoneType
-            else []
-        )
-        unhandled_properties = [
-            prop
-            for prop in obj.bl_rna.properties
-            if prop.identifier not in handled_prop_ids
-            and prop.identifier not in [RNA_TYPE]
-        ]
+        unhandled_properties = self.plans.unhandled(obj, assumed_type)
 
         def serializer(
             exporter: "Exporter",
@@ -484,8 +557,8 @@ From root: {from_root.to_str()}"""
             for prop in unhandled_properties:
                 from_root_prop = from_root.add_prop(prop)
 
-                if prop.type in PROP_TYPE_ENUM and getattr(obj, prop.identifier) == "":
-                    if self.debug_prints:
+                if prop.is_enum and getattr(obj, prop.identifier) == "":
+                    if exporter.debug_prints:
                         print(f"{from_root_prop.to_str()}: skipping empty str enum")
                     continue
 
@@ -499,13 +572,47 @@ From root: {from_root.to_str()}"""
 
             return data
 
+        return serializer
+
+    def _export_obj(
+        self,
+        *,
+        obj: bpy.types.bpy_struct,
+        from_root: FromRoot,
+    ) -> dict[str, Any]:
+        if isinstance(obj, bpy.types.Node):
+            self.report.exported_nodes += 1
+        if isinstance(obj, bpy.types.NodeLink):
+            self.report.exported_links += 1
+        if isinstance(obj, bpy.types.NodeTree):
+            self.report.exported_trees += 1
+
+        # edge case for things like bpy_prop_collection that aren't real RNA types?
+        # https://projects.blender.org/blender/blender/issues/150092
+        if not hasattr(obj, BL_RNA):
+            assert isinstance(obj, bpy.types.bpy_prop_collection)
+            return self._export_obj_with_serializer(
+                obj=obj,
+                serializer=self.specific_handlers[NoneType],
+                from_root=from_root,
+            )
+
+        assumed_type = self.dispatch.lookup(obj)
+
+        # all objects of one RNA type handled by the same handler share this
+        key = (obj.bl_rna.identifier, assumed_type)
+        serializer = self.serializers.get(key)
+        if serializer is None:
+            serializer = self._make_serializer(obj=obj, assumed_type=assumed_type)
+            self.serializers[key] = serializer
+
         return self._export_obj_with_serializer(
             obj=obj,
             serializer=serializer,
             from_root=from_root,
         )
 
-    def _export_node_tree(
+    def _begin_node_tree(
         self,
         *,
         node_tree: bpy.types.NodeTree,
@@ -515,9 +622,29 @@ From root: {from_root.to_str()}"""
             print(f"{from_root.to_str()}: entering")
 
         self.current_tree = node_tree
-        data = self._export_obj(obj=node_tree, from_root=from_root)
+        return self._export_obj(obj=node_tree, from_root=from_root)
+
+    def _finish_node_tree(self, *, from_root: FromRoot) -> None:
+        assert not self.deferred
         self.current_tree = None
 
+        self.report.dispatch_hits = self.dispatch.hits
+        self.report.dispatch_misses = self.dispatch.misses
+        if self.debug_prints:
+            print(
+                f"{from_root.to_str()}: handler lookups {self.dispatch.hits} cached, {self.dispatch.misses} resolved"
+            )
+
+    def _export_node_tree(
+        self,
+        *,
+        node_tree: bpy.types.NodeTree,
+        from_root: FromRoot,
+    ) -> dict[str, Any]:
+        data = self._begin_node_tree(node_tree=node_tree, from_root=from_root)
+        while self.deferred:
+            self.deferred.popleft()()
+        self._finish_node_tree(from_root=from_root)
         return data
 
 
@@ -598,6 +725,63 @@ class _Encoder(json.JSONEncoder):
         return super().default(o)
 
 
+class _JsonStream:
+    """Writes the top level object piece by piece, so the trees don't have to be kept around.
+    The result is the same as json.dump with the same indent, with the trees' spans added at the end."""
+
+    def __init__(self, *, sink: TextIO, json_indent: int | None) -> None:
+        self.sink = sink
+        self.indent = json_indent
+        self.item_separator = ", " if json_indent is None else ","
+
+        # where each tree starts and ends in the text, so the import doesn't have to search
+        self.position = 0
+        self.spans: list[tuple[int, int]] = []
+
+    def _write(self, text: str) -> None:
+        self.sink.write(text)
+        self.position += len(text)
+
+    def _newline(self, level: int) -> str:
+        return "" if self.indent is None else "\n" + " " * (self.indent * level)
+
+    def _encode(self, value: Any, level: int) -> str:
+        encoded = json.dumps(value, cls=_Encoder, indent=self.indent)
+        if self.indent is None:
+            return encoded
+        return encoded.replace("\n", self._newline(level))
+
+    def begin(self, head: dict[str, Any]) -> None:
+        self._write("{")
+        for key, value in head.items():
+            self._write(
+                f"{self._newline(1)}{json.dumps(key)}: {self._encode(value, 1)}{self.item_separator}"
+            )
+        self._write(f"{self._newline(1)}{json.dumps(TREES)}: [")
+
+    def write_tree(self, tree: dict[str, Any]) -> None:
+        if self.spans:
+            self._write(self.item_separator)
+        self._write(self._newline(2))
+        start = self.position
+        self._write(self._encode(tree, 2))
+        self.spans.append((start, self.position))
+
+    def end(self, tail: dict[str, Any]) -> None:
+        if self.spans:
+            self._write(self._newline(1))
+        self._write("]")
+        for key, value in tail.items():
+            self._write(
+                f"{self.item_separator}{self._newline(1)}{json.dumps(key)}: {self._encode(value, 1)}"
+            )
+        # last, so the import can find it from the end
+        self._write(
+            f"{self.item_separator}{self._newline(1)}{json.dumps(TREE_SPANS)}: {json.dumps(self.spans)}"
+        )
+        self._write(f"{self._newline(0)}}}")
+
+
 class ExportIntermediate:
     def __init__(self, parameters: ExportParameters) -> None:
         exporter = Exporter(
@@ -633,60 +817,212 @@ class ExportIntermediate:
         if parameters.is_material:
             data[MATERIAL_NAME] = parameters.name
 
-        self.total_steps = len(trees) + 1
+        # progress is counted in nodes and links, that's what takes time
+        self.total_objects = sum(len(tree.nodes) + len(tree.links) for tree, _ in trees)
+        self.total_steps = self.total_objects + 1
         self.exporter = exporter
         self.unexported_trees = trees
         self.data = data
 
-    def step(self) -> bool:
+        # the tree that is partially exported
+        self.current: tuple[dict[str, Any], FromRoot] | None = None
+        self.finished = False
+        self.throughput = Throughput()
+
+        # external scenes share their info between all pointers to it
+        self.scene_ids: dict[bpy.types.bpy_struct, int] = {}
+
+        # trees might be written as soon as they're done, see stream_to
+        self.stream: _JsonStream | None = None
+
+        # with stream_to_file, the temporary file and where it goes once it's complete
+        self.stream_paths: tuple[Path, Path] | None = None
+
+    def stream_to(self, *, sink: TextIO, json_indent: int | None) -> None:
+        """Write each tree to the sink as soon as it's done, instead of keeping it.
+        Must be called before the first step, finish with end_stream."""
+        assert self.stream is None
+        assert not self.data[TREES] and self.current is None
+        self.stream = _JsonStream(sink=sink, json_indent=json_indent)
+        self.stream.begin(self._head())
+
+    def _head(self) -> dict[str, Any]:
+        """What is written before the trees, it's known from the start"""
+        return {
+            key: value
+            for key, value in self.data.items()
+            if key in [BLENDER_VERSION, TREE_CLIPPER_VERSION]
+        }
+
+    def _tail(self) -> dict[str, Any]:
+        """What is written after the trees, only complete after set_external"""
+        return {
+            key: value
+            for key, value in self.data.items()
+            if key not in [BLENDER_VERSION, TREE_CLIPPER_VERSION, TREES]
+        }
+
+    def stream_to_file(
+        self, *, file_path: Path, compress: bool, json_indent: int | None
+    ) -> None:
+        """Like stream_to, but into a temporary file next to file_path.
+        Only end_stream replaces file_path, so a cancelled export leaves it untouched."""
+        file = tempfile.NamedTemporaryFile(
+            mode="w",
+            encoding="utf-8",
+            newline="",
+            dir=file_path.parent,
+            prefix=f".{file_path.name}.",
+            suffix=".tmp",
+            delete=False,
+        )
+        self.stream_paths = (Path(file.name), file_path)
+        if compress:
+            self.stream_to(sink=CompressedWriter(file), json_indent=None)
+        else:
+            self.stream_to(sink=file, json_indent=json_indent)
+
+    def is_streaming(self) -> bool:
+        return self.stream is not None
+
+    def end_stream(self) -> None:
+        """Write the external items and scenes, after set_external"""
+        assert self.finished
+        assert isinstance(self.stream, _JsonStream)
+        self.stream.end(self._tail())
+        self.stream.sink.close()
+        self.stream = None
+
+        if self.stream_paths is not None:
+            temporary, target = self.stream_paths
+            os.replace(temporary, target)
+            self.stream_paths = None
+
+    def close_stream(self) -> None:
+        """Stop streaming without finishing, the temporary file of stream_to_file is removed"""
+        if self.stream is not None:
+            self.stream.sink.close()
+            self.stream = None
+
+        if self.stream_paths is not None:
+            temporary, _ = self.stream_paths
+            temporary.unlink(missing_ok=True)
+            self.stream_paths = None
+
+    def step(self, budget_ms: float = 0) -> bool:
+        """Export for roughly budget_ms milliseconds, but at least one piece.
+        Returns False once everything is exported."""
+        deadline = time.perf_counter() + budget_ms / 1000
+        while self._step_once():
+            if time.perf_counter() >= deadline:
+                return True
+        return False
+
+    def _step_once(self) -> bool:
+        if self.exporter.deferred:
+            self.exporter.deferred.popleft()()
+            return True
+
+        if self.current is not None:
+            tree_data, from_root = self.current
+            self.exporter._finish_node_tree(from_root=from_root)
+            self.data[TREES].append(tree_data)  # ty:ignore[possibly-missing-attribute]
+            self.current = None
+            self._resolve_pointers(final=False)
+            self._flush_trees()
+            return True
+
         if self.unexported_trees:
             tree, from_root = self.unexported_trees.pop(0)
-            self.data[TREES].append(  # ty:ignore[possibly-missing-attribute]
-                self.exporter._export_node_tree(node_tree=tree, from_root=from_root)
+            self.current = (
+                self.exporter._begin_node_tree(node_tree=tree, from_root=from_root),
+                from_root,
             )
             return True
 
-        for obj, pointers in self.exporter.pointers.items():
+        if self.finished:
+            return False
+        self.finished = True
+
+        self._resolve_pointers(final=True)
+        self._flush_trees()
+
+        return False
+
+    def _resolve_pointers(self, *, final: bool) -> None:
+        # pointers to trees that aren't exported yet have to wait
+        waiting_for = (
+            set()
+            if final
+            else {
+                self.exporter.id_index.canonical_reference(tree)
+                for tree, _ in self.unexported_trees
+            }
+        )
+
+        unresolved = []
+        for obj, pointer in self.exporter.unresolved_pointers:
             if obj in self.exporter.serialized:
-                for pointer in pointers:
-                    pointer.pointee_id = self.exporter.serialized[obj]
-            else:
-                assert isinstance(obj, bpy.types.ID), (
-                    "Only ID types can be external items"
-                )
+                pointer.pointee_id = self.exporter.serialized[obj]
+                continue
+            if obj in waiting_for:
+                unresolved.append((obj, pointer))
+                continue
+
+            assert isinstance(obj, bpy.types.ID), "Only ID types can be external items"
 
-                scene_id = None
-                if isinstance(obj, bpy.types.Scene):
+            scene_id = None
+            if isinstance(obj, bpy.types.Scene):
+                scene_id = self.scene_ids.get(obj)
+                if scene_id is None:
                     scene_id = self.exporter.next_id
                     self.exporter.next_id += 1
+                    self.scene_ids[obj] = scene_id
                     self.data[SCENES][scene_id] = export_scene_info(obj)  # ty:ignore[invalid-assignment]
 
-                # Maybe it could be beneficial in some cases to have the option to have a single external item,
-                # but it's also possible to use an additional group node to avieve the same thing.
-                # Let's rather keep it simple here for now.
-                for pointer in pointers:
-                    external_id = self.exporter.next_id
-                    self.exporter.next_id += 1
-                    self.data[EXTERNAL][external_id] = External(  # ty:ignore[invalid-assignment]
-                        pointed_to_by=pointer,
-                        scene_id=scene_id,
-                    )
-                    pointer.pointee_id = external_id
+            # Maybe it could be beneficial in some cases to have the option to have a single external item,
+            # but it's also possible to use an additional group node to avieve the same thing.
+            # Let's rather keep it simple here for now.
+            external_id = self.exporter.next_id
+            self.exporter.next_id += 1
+            self.data[EXTERNAL][external_id] = External(  # ty:ignore[invalid-assignment]
+                pointed_to_by=pointer,
+                scene_id=scene_id,
+            )
+            pointer.pointee_id = external_id
 
-        return False
+        self.exporter.unresolved_pointers = unresolved
+
+    def _flush_trees(self) -> None:
+        # a tree can only be written once all the pointers in it are resolved,
+        # and the order of the trees must be kept
+        if self.stream is None or self.exporter.unresolved_pointers:
+            return
+        for tree_data in self.data[TREES]:  # ty:ignore[not-iterable]
+            self.stream.write_tree(tree_data)
+        self.data[TREES].clear()  # ty:ignore[possibly-missing-attribute]
+
+    def objects_done(self) -> int:
+        report = self.exporter.report
+        return min(report.exported_nodes + report.exported_links, self.total_objects)
 
     def progress(self) -> int:
-        return self.total_steps - len(self.unexported_trees)
+        return self.total_steps if self.finished else self.objects_done()
+
+    def status(self) -> str:
+        return "Exporting: " + self.throughput.describe(
+            self.objects_done(), self.total_objects
+        )
 
     def export_to_str(self, *, compress: bool, json_indent: int) -> str:
-        assert not self.unexported_trees
+        assert self.finished
+        assert self.stream is None, "the trees were already streamed"
+        sink = io.StringIO()
         if compress:
-            json_str = json.dumps(self.data, cls=_Encoder)
-            gzipped = gzip.compress(json_str.encode("utf-8"))
-            base64_str = base64.b64encode(gzipped).decode("utf-8")
-            return MAGIC_STRING + base64_str
+            self._write_compressed(sink)
         else:
-            return json.dumps(self.data, cls=_Encoder, indent=json_indent)
+            self._write_all(sink, json_indent)
+        return sink.getvalue()
 
     def export_to_file(
         self,
@@ -695,22 +1031,36 @@ class ExportIntermediate:
         compress: bool,
         json_indent: int,
     ) -> None:
-        assert not self.unexported_trees
-        with file_path.open("w", encoding="utf-8") as file:
+        assert self.finished
+        assert self.stream is None, "the trees were already streamed"
+        # no newline translation, TREE_SPANS are offsets into exactly this text
+        with file_path.open("w", encoding="utf-8", newline="") as file:
             if compress:
-                string = self.export_to_str(compress=compress, json_indent=json_indent)
-                file.write(string)
+                self._write_compressed(file)
             else:
-                json.dump(self.data, file, cls=_Encoder, indent=json_indent)
+                self._write_all(file, json_indent)
+
+    def _write_compressed(self, sink: TextIO) -> None:
+        # no intermediate copies of the whole thing, the JSON is compressed as it's encoded
+        writer = CompressedWriter(sink)
+        self._write_all(writer, None)  # ty:ignore[invalid-argument-type]
+        writer.finish()
+
+    def _write_all(self, sink: TextIO, json_indent: int | None) -> None:
+        stream = _JsonStream(sink=sink, json_indent=json_indent)
+        stream.begin(self._head())
+        for tree in self.data[TREES]:  # ty:ignore[not-iterable]
+            stream.write_tree(tree)
+        stream.end(self._tail())
 
     def get_external(self) -> dict[int, External]:
-        assert not self.unexported_trees
+        assert self.finished
         return self.data[EXTERNAL]  # ty:ignore[invalid-return-type]
 
     def set_external(
         self,
         ids_and_descriptions: Iterator[Tuple[int, str]],
     ) -> None:
-        assert not self.unexported_trees
+        assert self.finished
         for external_id, description in ids_and_descriptions:
             self.data[EXTERNAL][external_id].description = description  # ty:ignore[invalid-assignment]
@@ -0,0 +1,175 @@
+import bpy
+
+from typing import Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .import_nodes import Importer
+
+# where a path starts
+ROOT_NODE_GROUP = "node_group"
+ROOT_MATERIAL = "material"
+ROOT_CALLABLE = "callable"  # any other getter, e.g. for external items
+
+
+class ItemsPass:
+    """The items of a collection, looked up once for importing them one after another.
+    Indexing nodes and links is linear, so we don't want to do it per item.
+    The handles are listed again in every import step, Blender might have changed
+    anything in between. The paths only use these while the pass lasts, afterwards they index again."""
+
+    def __init__(self, collection: "GetterPath") -> None:
+        self.collection = collection
+        self.handles: list[bpy.types.bpy_struct] | None = None
+        self.step = -1
+        self._list()
+
+    def _list(self) -> None:
+        self.handles = list(self.collection())  # ty: ignore[invalid-argument-type]
+        self.step = self.collection.importer.step_count
+
+    def handle(self, i: int) -> bpy.types.bpy_struct | None:
+        """The i-th item, or None once the pass has ended"""
+        if self.handles is None:
+            return None
+        if self.step != self.collection.importer.step_count:
+            self._list()
+        return self.handles[i]  # ty: ignore[not-subscriptable]
+
+    def item_getter(self, i: int) -> "GetterPath":
+        return self.collection.index(i, items_pass=self)
+
+    def end(self) -> None:
+        self.handles = None
+
+
+class GetterPath:
+    """A getter as a path of steps from a root, e.g. node_groups['Tree'].nodes[3].inputs[0]
+    Calling it resolves the path, the result of every step is remembered until
+    the importer changes the structure, so siblings share the work for their common prefix."""
+
+    __slots__ = (
+        "importer",
+        "parent",
+        "root_kind",
+        "root_name",
+        "root_getter",
+        "attr",
+        "index_",
+        "items_pass",
+        "generation",
+        "value",
+    )
+
+    def __init__(
+        self,
+        importer: "Importer",
+        *,
+        parent: "GetterPath | None" = None,
+        root_kind: str | None = None,
+        root_name: str | None = None,
+        root_getter: Callable[[], bpy.types.bpy_struct] | None = None,
+        attr: str | None = None,
+        index: int | None = None,
+        items_pass: ItemsPass | None = None,
+    ) -> None:
+        self.importer = importer
+        self.parent = parent
+        self.root_kind = root_kind
+        self.root_name = root_name
+        self.root_getter = root_getter
+        self.attr = attr
+        self.index_ = index
+        self.items_pass = items_pass
+
+        self.generation = -1
+        self.value = None
+
+    @staticmethod
+    def node_group(importer: "Importer", name: str) -> "GetterPath":
+        return GetterPath(importer, root_kind=ROOT_NODE_GROUP, root_name=name)
+
+    @staticmethod
+    def material(importer: "Importer", name: str) -> "GetterPath":
+        return GetterPath(importer, root_kind=ROOT_MATERIAL, root_name=name)
+
+    @staticmethod
+    def wrap(
+        importer: "Importer", getter: Callable[[], bpy.types.bpy_struct]
+    ) -> "GetterPath":
+        if isinstance(getter, GetterPath):
+            return getter
+        return GetterPath(importer, root_kind=ROOT_CALLABLE, root_getter=getter)
+
+    def attribute(self, attr: str) -> "GetterPath":
+        return GetterPath(self.importer, parent=self, attr=attr)
+
+    def index(self, index: int, items_pass: ItemsPass | None = None) -> "GetterPath":
+        return GetterPath(self.importer, parent=self, index=index, items_pass=items_pass)
+
+    def position_in(self, root: "GetterPath | None", attr: str) -> int | None:
+        """The index, if this is root.attr[index]"""
+        if self.index_ is None or self.parent is None:
+            return None
+        collection = self.parent
+        if collection.attr != attr or collection.parent is not root:
+            return None
+        return self.index_
+
+    def _resolve_root(self) -> bpy.types.bpy_struct:
+        if self.root_kind == ROOT_NODE_GROUP:
+            return bpy.data.node_groups[self.root_name]  # ty: ignore[invalid-argument-type]
+        if self.root_kind == ROOT_MATERIAL:
+            return bpy.data.materials[self.root_name].node_tree  # ty: ignore[invalid-argument-type]
+        assert self.root_getter is not None
+        return self.root_getter()
+
+    def _resolve_step(self, parent_value) -> bpy.types.bpy_struct:
+        if self.attr is not None:
+            return getattr(parent_value, self.attr)
+        if self.items_pass is not None:
+            handle = self.items_pass.handle(self.index_)  # ty: ignore[invalid-argument-type]
+            if handle is not None:
+                return handle
+        return parent_value[self.index_]
+
+    def __call__(self) -> bpy.types.bpy_struct:
+        generation = self.importer.generation
+        if self.generation == generation:
+            return self.value  # ty: ignore[invalid-return-type]
+
+        # walk up until something is still known, then down again
+        steps = []
+        node = self
+        while node.generation != generation and node.parent is not None:
+            steps.append(node)
+            node = node.parent
+
+        if node.generation != generation:
+            node.value = node._resolve_root()
+            node.generation = generation
+
+        value = node.value
+        for step in reversed(steps):
+            value = step._resolve_step(value)
+            step.value = value
+            step.generation = generation
+
+        return value  # ty: ignore[invalid-return-type]
+
+    def to_str(self) -> str:
+        pieces = []
+        node = self
+        while node.parent is not None:
+            if node.attr is not None:
+                pieces.append(f".{node.attr}")
+            else:
+                pieces.append(f"[{node.index_}]")
+            node = node.parent
+        if node.root_kind == ROOT_NODE_GROUP:
+            pieces.append(f"bpy.data.node_groups[{node.root_name!r}]")
+        elif node.root_kind == ROOT_MATERIAL:
+            pieces.append(f"bpy.data.materials[{node.root_name!r}].node_tree")
+        else:
+            pieces.append(f"<{node.root_getter!r}>")
+        pieces.reverse()
+        return "".join(pieces)
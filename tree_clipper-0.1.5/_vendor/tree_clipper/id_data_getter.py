@@ -125,3 +125,39 @@ def canonical_reference(obj: bpy.types.bpy_struct) -> bpy.types.bpy_struct:
     assert ref is not None
 
     return ref
+
+
+class IdIndex:
+    """Same as canonical_reference, but with one scan per ID type instead of one per call.
+    Only meant to live as long as one export, the data blocks aren't expected to change."""
+
+    def __init__(self) -> None:
+        self.by_id_type: dict[str, dict[str, bpy.types.ID]] = {}
+
+    def _scan(self, id_type: str) -> dict[str, bpy.types.ID]:
+        by_name = {}
+        for ref in _ID_TYPE_TO_DATA_BLOCK[id_type]():
+            # the first one wins, just like in canonical_reference
+            by_name.setdefault(ref.name, ref)
+        self.by_id_type[id_type] = by_name
+        return by_name
+
+    def canonical_reference(self, obj: bpy.types.bpy_struct) -> bpy.types.bpy_struct:
+        if not isinstance(obj, bpy.types.ID):
+            return obj
+
+        if isinstance(obj, bpy.types.ShaderNodeTree):
+            return obj
+
+        by_name = self.by_id_type.get(obj.id_type)
+        if by_name is None:
+            by_name = self._scan(obj.id_type)
+
+        ref = by_name.get(obj.name)
+        if ref is None:
+            # something was added or renamed since we last looked
+            ref = self._scan(obj.id_type).get(obj.name)
+
+        assert ref is not None
+
+        return ref
@@ -1,13 +1,14 @@
 import bpy
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from operator import xor
 
-import base64
-import gzip
 import json
+import time
 from types import NoneType
 
-from typing import Any, Type, Tuple, Iterator
+from typing import Any, Callable, Type, Tuple, Iterator
 
 from pathlib import Path
 
@@ -15,29 +16,27 @@ from .common import (
     CURRENT_TREE_CLIPPER_VERSION,
     DATA,
     DESERIALIZER,
-    FORBIDDEN_PROPERTIES,
     GETTER,
     ID,
     MATERIAL_NAME,
-    SIMPLE_PROP_TYPE,
-    SIMPLE_PROPERTY_TYPES_AS_STRS,
     BLENDER_VERSION,
     SIMPLE_DATA_TYPE,
-    SIMPLE_PROP_TYPE_TUPLE,
     TREE_CLIPPER_VERSION,
     TREES,
     FromRoot,
-    most_specific_type_handled,
+    HandlerDispatch,
+    Throughput,
     MAGIC_STRING,
     EXTERNAL_SERIALIZATION,
-    PROP_TYPE_ENUM,
-    DEFAULT_VALUE,
     PROP_TYPE_POINTER,
     PROP_TYPE_COLLECTION,
+    INPUTS,
     ITEMS,
     NAME,
+    OUTPUTS,
+    NODE_TREE_LINKS,
+    NODE_TREE_NODES,
     BL_RNA,
-    RNA_TYPE,
     BL_IDNAME,
     EXTERNAL_DESCRIPTION,
     EXTERNAL,
@@ -46,10 +45,69 @@ from .common import (
     EXTERNAL_SCENE_ID,
 )
 
+from .bulk_arrays import MIN_BULK_ITEMS, bulk_write, item_type
+from .compression import MAGIC_BYTES, CompressedReader
+from .lazy_payload import LazyTrees, parse_lazily
+from .getter_path import GetterPath, ItemsPass
 from .id_data_getter import make_id_data_getter
+from .import_program import (
+    OP_CALL,
+    OP_END_PASS,
+    OP_FILL_VALUE,
+    OP_FINISH_TREE,
+    OP_IMPORT_ITEM,
+    OP_IMPORT_LINK,
+    OP_IMPORT_NODE,
+    OP_IMPORT_TREE,
+    OP_RUN_PHASE,
+    OP_SET_ENUM_DEFAULT,
+    OP_ZONE_SOCKETS,
+    PHASE_AFTER_TREE,
+    PHASE_FILL,
+    ImportProgram,
+    Instruction,
+)
+from .property_plans import (
+    MISSING_ASSUME_DEFAULT,
+    MISSING_ASSUME_NOT_SET,
+    PropertyPlan,
+    PropertyPlans,
+)
 from .scene_info import verify_scene, SceneValidationError
 
 
+# the tree's own collections are imported item by item
+_ITEM_OPCODES = {
+    NODE_TREE_NODES: OP_IMPORT_NODE,
+    NODE_TREE_LINKS: OP_IMPORT_LINK,
+}
+
+
+class TreeNodeIndex:
+    """The current tree's nodes, listed once.
+    Looking them up by name or index in the collection is linear."""
+
+    def __init__(self, importer: "Importer") -> None:
+        self.importer = importer
+        self.tree_getter = importer.current_tree_getter
+        self.nodes: list[bpy.types.Node] = list(self.tree_getter().nodes)  # ty: ignore[call-non-callable, unresolved-attribute]
+        self.by_name = {node.name: node for node in self.nodes}
+
+    def position(self, getter: GETTER) -> int | None:
+        if not isinstance(getter, GetterPath):
+            return None
+        return getter.position_in(self.tree_getter, NODE_TREE_NODES)  # ty: ignore[invalid-argument-type]
+
+    def node(self, getter: GETTER) -> bpy.types.Node:
+        position = self.position(getter)
+        if position is None:
+            return getter()  # ty: ignore[invalid-return-type]
+        return self.nodes[position]
+
+    def node_of_id(self, ident: int) -> bpy.types.Node:
+        return self.node(self.importer.getters[ident])
+
+
 class ImportReport:
     def __init__(
         self,
@@ -61,6 +119,21 @@ class ImportReport:
         self.renames_node_group: dict[str, str] = {}
         self.warnings: list[str] = []
 
+        # how often the handler lookup was answered from the cache
+        self.dispatch_hits: int = 0
+        self.dispatch_misses: int = 0
+
+        # type determining writes that were moved before the handler, which imports the sockets
+        self.socket_rebuilds_avoided: int = 0
+
+        # simple properties that already had the value vs. the ones that were set
+        self.writes_skipped: int = 0
+        self.writes_performed: int = 0
+
+        # per opcode of the import program, how often it ran and how long it took
+        self.opcode_counts: dict[str, int] = {}
+        self.opcode_seconds: dict[str, float] = {}
+
         self.last_getter: GETTER | None = None
 
 
@@ -70,29 +143,54 @@ class Importer:
         specific_handlers: dict[type, DESERIALIZER],
         getters: dict[int, GETTER],
         debug_prints: bool,
+        skip_unchanged_writes: bool = True,
+        structure_first: bool = False,
     ) -> None:
         self.specific_handlers = specific_handlers
+        self.dispatch = HandlerDispatch(specific_handlers)
         self.getters = getters
         self.debug_prints = debug_prints
+        self.skip_unchanged_writes = skip_unchanged_writes
 
-        # for sockets' default enum values we need to defer
-        # first, we link everything up, then set the default values
-        self.set_socket_enum_defaults = []
-
-        # for the viewer items we need to set auto removal
-        # only after the links are there
-        self.set_auto_remove = []
-
-        # for special nodes like the ones spanniung a repeat zone
-        # we must defer things until all nodes are created
-        # but it must happen before constructing the links
-        self.defer_after_nodes_before_links = []
+        # create the nodes, sockets and links of all trees first,
+        # the values that nothing depends on are only filled in afterwards
+        self.structure_first = structure_first
 
         # we need to lookup nodes and their sockets for linking them
         self.current_tree = None
+        self.current_tree_getter: GETTER | None = None
+
+        # the import of the current tree as instructions that can be run one at a time,
+        # some have to wait for a phase, e.g.
+        # pairing zones must happen after all nodes are created but before the links,
+        # viewer items may only be set to auto remove once the links are there,
+        # and sockets' default enum values are set last
+        self.program = ImportProgram()
+
+        # zones are paired and nodes are parented in one pass each, once all nodes exist
+        self.zone_pairings: list[tuple[GETTER, str, Callable[[], None], FromRoot]] = []
+        self.node_parents: list[tuple[GETTER, int]] = []
+        self.node_index: TreeNodeIndex | None = None
+
+        # the numeric properties of collection items that were already written with foreach_set,
+        # by the item's getter until it is imported
+        self.bulk_written: dict[GETTER, set[str]] = {}
 
         self.report = ImportReport()
 
+        # resolved getter paths are only valid as long as this stays the same
+        self.generation = 0
+
+        # counts the import steps, between them Blender might have changed anything, see new_step
+        self.step_count = 0
+
+        # the schema work only needs to happen once per RNA type
+        self.plans = PropertyPlans()
+        self.deserializers: dict[tuple[str, type], DESERIALIZER] = {}
+        self.simple_writable_plans: dict[
+            tuple[type, tuple[str, ...]], list[tuple[PropertyPlan, bool]]
+        ] = {}
+
     ################################################################################
     # helper functions to be used in specific handlers
     ################################################################################
@@ -106,20 +204,20 @@ class Importer:
         forbidden: list[str],
         from_root: FromRoot,
     ) -> None:
-        for prop in assumed_type.bl_rna.properties:
-            if prop.identifier in forbidden:
+        for prop, explicitly_forbidden in self._simple_writable_plan(
+            assumed_type=assumed_type,
+            forbidden=forbidden,
+        ):
+            if explicitly_forbidden:
                 if self.debug_prints:
                     print(f"{from_root.add_prop(prop).to_str()}: explicitly forbidden")
                 continue
-            if prop.is_readonly or prop.type not in SIMPLE_PROPERTY_TYPES_AS_STRS:
-                continue
             if prop.identifier not in serialization:
                 if self.debug_prints:
                     print(
                         f"{from_root.add_prop(prop).to_str()}: missing, assuming default"
                     )
                 continue
-            assert isinstance(prop, SIMPLE_PROP_TYPE_TUPLE)
             self._import_property_simple(
                 getter=getter,
                 prop=prop,
@@ -135,8 +233,9 @@ class Importer:
         properties: list[str],
         from_root: FromRoot,
     ) -> None:
+        plans = self.plans.of_struct(getter())
         for identifier in properties:
-            prop = getter().bl_rna.properties[identifier]
+            prop = plans[identifier]
             self._import_property(
                 getter=getter,
                 prop=prop,
@@ -144,6 +243,107 @@ class Importer:
                 from_root=from_root.add_prop(prop),
             )
 
+    def defer(self, work: Callable[[], None], opcode: str = OP_CALL) -> None:
+        """Run this later, but before anything that was deferred before the current piece.
+        Work deferred within one piece runs in the order it was deferred."""
+        if self.current_tree is None:
+            work()
+        else:
+            self.program.emit(Instruction(opcode, work))
+
+    def defer_to_phase(
+        self, phase: str, work: Callable[[], None], opcode: str = OP_CALL
+    ) -> None:
+        """Run this when the current tree's import reaches the phase"""
+        self.program.emit_in_phase(phase, Instruction(opcode, work))
+
+    def run_phase(self, phase: str) -> None:
+        for instruction in self.program.take_phase(phase):
+            self.defer(instruction.func, instruction.opcode)
+
+    def getter_path(self, getter: GETTER) -> GetterPath:
+        """Any getter as a path, to build the getters of sub-objects from"""
+        return GetterPath.wrap(self, getter)
+
+    def structure_changed(self) -> None:
+        """Call this after anything that might add, remove or rebuild items or sockets.
+        It makes all getter paths resolve again."""
+        self.generation += 1
+
+    def new_step(self) -> None:
+        """Call this before importing after the UI had a chance to run.
+        Nothing that was looked up before can be trusted, see ItemsPass and TreeNodeIndex."""
+        self.step_count += 1
+        self.structure_changed()
+        # it holds node handles, it's simply built again when needed
+        self.node_index = None
+
+    def defer_zone_pairing(
+        self,
+        *,
+        getter: GETTER,
+        output: str,
+        then: Callable[[], None],
+        from_root: FromRoot,
+    ) -> None:
+        """Pair the zone input with the output node of that name once it exists, then run 'then'"""
+        self.zone_pairings.append((getter, output, then, from_root))
+
+    def defer_node_parent(self, *, getter: GETTER, parent_id: int) -> None:
+        """Parent the node once the parent exists"""
+        self.node_parents.append((getter, parent_id))
+
+    def tree_node_index(self) -> TreeNodeIndex:
+        """Only use this once all nodes of the current tree are created"""
+        if self.node_index is None:
+            self.node_index = TreeNodeIndex(self)
+        return self.node_index
+
+    def pair_zones(self) -> None:
+        if not self.zone_pairings:
+            return
+        index = self.tree_node_index()
+        for getter, output, then, from_root in self.zone_pairings:
+            if not index.node(getter).pair_with_output(index.by_name[output]):  # ty: ignore[unresolved-attribute]
+                raise RuntimeError(f"{from_root.to_str()}: failed to pair with {output}")
+            # the sockets can be imported piece by piece
+            self.defer(then, OP_ZONE_SOCKETS)
+        self.zone_pairings.clear()
+        self.structure_changed()
+
+    def assign_node_parents(self) -> None:
+        if not self.node_parents:
+            return
+        index = self.tree_node_index()
+
+        # outer frames first, so a frame is in place before its children are attached
+        parent_positions = {}
+        for getter, parent_id in self.node_parents:
+            position = index.position(getter)
+            if position is not None:
+                parent_positions[position] = index.position(self.getters[parent_id])
+
+        depths: dict[int | None, int] = {None: -1}
+
+        def depth(position: int | None) -> int:
+            chain = []
+            while position not in depths:
+                chain.append(position)
+                position = parent_positions.get(position)  # ty: ignore[no-matching-overload]
+                if position in chain:
+                    raise RuntimeError("Frames are parented in a cycle")
+            known = depths[position]
+            for position in reversed(chain):
+                known += 1
+                depths[position] = known
+            return known
+
+        for getter, parent_id in sorted(
+            self.node_parents, key=lambda record: depth(index.position(record[0]))
+        ):
+            index.node(getter).parent = index.node_of_id(parent_id)
+        self.node_parents.clear()
+
     def register_as_deserialized(self, *, ident: int, getter: GETTER):
         if ident in self.getters:
             raise RuntimeError("Double deserialization")
@@ -153,53 +353,107 @@ class Importer:
     # internals
     ################################################################################
 
+    def _simple_writable_plan(
+        self,
+        *,
+        assumed_type: Type[bpy.types.bpy_struct],
+        forbidden: list[str],
+    ) -> list[tuple[PropertyPlan, bool]]:
+        key = (assumed_type, tuple(forbidden))
+        plan = self.simple_writable_plans.get(key)
+        if plan is None:
+            plan = [
+                (prop, prop.identifier in forbidden)
+                for prop in self.plans.simple_writable(assumed_type)
+            ]
+            self.simple_writable_plans[key] = plan
+        return plan
+
     def _import_property_simple(
         self,
         *,
         getter: GETTER,
-        prop: SIMPLE_PROP_TYPE,
+        prop: PropertyPlan,
         serialization: SIMPLE_DATA_TYPE,
         from_root: FromRoot,
     ) -> None:
         if self.debug_prints:
             print(f"{from_root.to_str()}: importing simple")
 
-        assert prop.type in SIMPLE_PROPERTY_TYPES_AS_STRS
+        assert prop.is_simple
         assert not prop.is_readonly
 
         identifier = prop.identifier
 
-        if identifier in FORBIDDEN_PROPERTIES:
+        if prop.is_forbidden:
             if self.debug_prints:
                 print(f"{from_root.to_str()}: forbidden")
             return
 
-        if (
-            (
-                isinstance(getter(), bpy.types.NodeSocket)
-                or isinstance(getter(), bpy.types.NodeTreeInterfaceSocket)
-            )
-            and prop.type == PROP_TYPE_ENUM
-            and identifier == DEFAULT_VALUE
-        ):
+        written = self.bulk_written.get(getter)  # ty: ignore[no-matching-overload]
+        if written is not None and identifier in written:
+            if self.debug_prints:
+                print(f"{from_root.to_str()}: already written in bulk")
+            return
+
+        if prop.is_socket_enum_default:
             if self.debug_prints:
                 print(f"{from_root.to_str()}: defer setting enum default for now")
-            self.set_socket_enum_defaults.append(
-                lambda: setattr(getter(), identifier, serialization)
-            )
+            def set_enum_default() -> None:
+                if self._write_simple(getter(), prop, serialization, from_root):
+                    self.structure_changed()
+
+            self.defer_to_phase(PHASE_AFTER_TREE, set_enum_default, OP_SET_ENUM_DEFAULT)
             return
 
-        if prop.type == PROP_TYPE_ENUM and prop.is_enum_flag:
+        if prop.is_enum_flag:
             assert isinstance(serialization, list)
-            setattr(getter(), identifier, set(serialization))
+            value = set(serialization)
         else:
-            setattr(getter(), identifier, serialization)
+            value = serialization
+
+        if self.structure_first and prop.can_fill_later:
+            self.defer_to_phase(
+                PHASE_FILL,
+                lambda: self._write_simple(getter(), prop, value, from_root),
+                OP_FILL_VALUE,
+            )
+            return
+
+        if self._write_simple(getter(), prop, value, from_root) and prop.changes_structure:
+            self.structure_changed()
+
+    def _write_simple(
+        self,
+        obj: bpy.types.bpy_struct,
+        prop: PropertyPlan,
+        value: SIMPLE_DATA_TYPE | set[str],
+        from_root: FromRoot,
+    ) -> bool:
+        """Returns whether it was actually written"""
+        identifier = prop.identifier
+        # every write can run update callbacks and tag the tree, reading is much cheaper
+        if self.skip_unchanged_writes:
+            current = getattr(obj, identifier)
+            if prop.is_array:
+                unchanged = list(current) == value
+            else:
+                unchanged = current == value
+            if unchanged:
+                self.report.writes_skipped += 1
+                if self.debug_prints:
+                    print(f"{from_root.to_str()}: unchanged, not writing")
+                return False
+
+        setattr(obj, identifier, value)
+        self.report.writes_performed += 1
+        return True
 
     def _import_property_pointer(
         self,
         *,
         getter: GETTER,
-        prop: bpy.types.PointerProperty,
+        prop: PropertyPlan,
         serialization: dict[str, Any] | int,
         from_root: FromRoot,
     ) -> None:
@@ -214,6 +468,7 @@ class Importer:
                 assert getattr(getter(), identifier) is None
             else:
                 setattr(getter(), identifier, None)
+                self.structure_changed()
         elif isinstance(serialization, int):
             if prop.is_readonly:
                 raise RuntimeError("Readonly pointer can't deferred in json")
@@ -224,12 +479,13 @@ class Importer:
             if self.debug_prints:
                 print(f"{from_root.to_str()}: resolving {serialization}")
             setattr(getter(), identifier, self.getters[serialization]())
+            self.structure_changed()
         else:
             attribute = getattr(getter(), identifier)
             if attribute is None:
                 raise RuntimeError("None pointer without deferring doesn't work")
             self._import_obj(
-                getter=lambda: getattr(getter(), identifier),
+                getter=self.getter_path(getter).attribute(identifier),
                 serialization=serialization,
                 from_root=from_root,
             )
@@ -238,7 +494,7 @@ class Importer:
         self,
         *,
         getter: GETTER,
-        prop: bpy.types.CollectionProperty,
+        prop: PropertyPlan,
         serialization: dict[str, Any],
         from_root: FromRoot,
     ) -> None:
@@ -248,15 +504,15 @@ class Importer:
         assert prop.type == PROP_TYPE_COLLECTION
         assert "items" in serialization[DATA]
 
-        identifier = prop.identifier
+        collection_getter = self.getter_path(getter).attribute(prop.identifier)
 
         self._import_obj(
-            getter=lambda: getattr(getter(), identifier),
+            getter=collection_getter,
             serialization=serialization,
             from_root=from_root,
         )
 
-        attribute = getattr(getter(), identifier)
+        attribute = collection_getter()
         serialized_items = serialization[DATA][ITEMS]
 
         if len(serialized_items) != len(attribute):
@@ -264,27 +520,113 @@ class Importer:
                 f"expected {len(serialized_items)} to be ready but deserialized {len(attribute)}"
             )
 
-        def make_getter(i: int) -> GETTER:
-            return lambda: getattr(getter(), identifier)[i]
-
-        for i, item in enumerate(serialized_items):
-            name = item[DATA].get(NAME, "unnamed")
-            self._import_obj(
-                getter=make_getter(i),
-                serialization=serialized_items[i],
-                from_root=from_root.add(f"[{i}] ({name})"),
+        # the tree's own collections can be huge, so we don't import their items in one go
+        if getter is self.current_tree_getter:
+            opcode = _ITEM_OPCODES.get(prop.identifier, OP_IMPORT_ITEM)
+            items_pass = ItemsPass(collection_getter)
+            written = self._bulk_write(
+                collection=attribute,
+                prop=prop,
+                elements=items_pass.handles,  # ty: ignore[invalid-argument-type]
+                serialized_items=serialized_items,
+                from_root=from_root,
             )
+            for i, item in enumerate(serialized_items):
+                item_getter = items_pass.item_getter(i)
+                if written:
+                    self.bulk_written[item_getter] = written
+                self.defer(
+                    self._make_item_work(
+                        getter=item_getter,
+                        serialization=item,
+                        from_root=from_root.add_item(i, item),
+                    ),
+                    opcode,
+                )
+            self.defer(items_pass.end, OP_END_PASS)
+        else:
+            written = self._bulk_write(
+                collection=attribute,
+                prop=prop,
+                elements=None,
+                serialized_items=serialized_items,
+                from_root=from_root,
+            )
+            for i, item in enumerate(serialized_items):
+                item_getter = collection_getter.index(i)
+                if written:
+                    self.bulk_written[item_getter] = written
+                self._import_obj(
+                    getter=item_getter,
+                    serialization=item,
+                    from_root=from_root.add_item(i, item),
+                )
+
+    def _bulk_write(
+        self,
+        *,
+        collection: bpy.types.bpy_prop_collection,
+        prop: PropertyPlan,
+        elements: list[bpy.types.bpy_struct] | None,
+        serialized_items: list[dict[str, Any]],
+        from_root: FromRoot,
+    ) -> set[str]:
+        if len(serialized_items) < MIN_BULK_ITEMS or not hasattr(
+            collection, "foreach_set"
+        ):
+            return set()
+
+        if elements is None:
+            elements = list(collection)
+        bulk_type = item_type(elements, prop.fixed_type)
+        if bulk_type is None:
+            return set()
+
+        # the items write these first thing and might get rebuilt or reset by it,
+        # which would lose whatever was written in bulk before
+        item_types = {element.bl_rna.identifier: element for element in elements}
+        for element in item_types.values():
+            if any(
+                plan.is_type_determining
+                for plan in self.plans.of_struct(element).values()
+            ):
+                if self.debug_prints:
+                    print(
+                        f"{from_root.to_str()}: not writing in bulk, {element.bl_rna.identifier} has type determining properties"
+                    )
+                return set()
+
+        written = bulk_write(
+            plans=self.plans.of_struct(bulk_type),
+            collection=collection,
+            serialized_items=serialized_items,
+        )
+        if written and self.debug_prints:
+            print(f"{from_root.to_str()}: written in bulk {sorted(written)}")
+        return written
+
+    def _make_item_work(
+        self,
+        *,
+        getter: GETTER,
+        serialization: dict[str, Any],
+        from_root: FromRoot,
+    ) -> Callable[[], None]:
+        return lambda: self._import_obj(
+            getter=getter,
+            serialization=serialization,
+            from_root=from_root,
+        )
 
     def _import_property(
         self,
         *,
         getter: GETTER,
-        prop: bpy.types.Property,
+        prop: PropertyPlan,
         serialization: SIMPLE_DATA_TYPE | dict[str, Any],
         from_root: FromRoot,
     ) -> None:
-        if prop.type in SIMPLE_PROPERTY_TYPES_AS_STRS:
-            assert isinstance(prop, SIMPLE_PROP_TYPE_TUPLE)
+        if prop.is_simple:
             return self._import_property_simple(
                 getter=getter,
                 prop=prop,
@@ -292,7 +634,6 @@ class Importer:
                 from_root=from_root,
             )
         elif prop.type == PROP_TYPE_POINTER:
-            assert isinstance(prop, bpy.types.PointerProperty)
             return self._import_property_pointer(
                 getter=getter,
                 prop=prop,
@@ -300,7 +641,6 @@ class Importer:
                 from_root=from_root,
             )
         elif prop.type == PROP_TYPE_COLLECTION:
-            assert isinstance(prop, bpy.types.CollectionProperty)
             return self._import_property_collection(
                 getter=getter,
                 prop=prop,
@@ -346,53 +686,26 @@ From root: {from_root.to_str()}"""
             from_root,
         )
 
-    def _import_obj(
+    def _make_deserializer(
         self,
         *,
-        getter: GETTER,
-        serialization: dict[str, Any],
-        from_root: FromRoot,
-    ) -> None:
-        if isinstance(getter(), bpy.types.Node):
-            self.report.imported_nodes += 1
-        if isinstance(getter(), bpy.types.NodeLink):
-            self.report.imported_links += 1
-        if isinstance(getter(), bpy.types.NodeTree):
-            self.report.imported_trees += 1
-
-        # edge case for things like bpy_prop_collection that aren't real RNA types?
-        if not hasattr(getter(), BL_RNA):
-            assert isinstance(getter(), bpy.types.bpy_prop_collection)
-            return self._import_obj_with_deserializer(
-                getter=getter,
-                serialization=serialization,
-                deserializer=self.specific_handlers[NoneType],
-                from_root=from_root,
-            )
-
-        assumed_type = most_specific_type_handled(self.specific_handlers, getter())
-        if (
-            isinstance(getter(), bpy.types.bpy_prop_collection)
-            and assumed_type is NoneType
-        ):
-            self._error_out(
-                getter=getter,
-                reason="collections must be handled *specifically*",
-                from_root=from_root,
-            )
-
+        obj: bpy.types.bpy_struct,
+        assumed_type: type,
+    ) -> DESERIALIZER:
         specific_handler = self.specific_handlers[assumed_type]
-        handled_prop_ids = (
-            [prop.identifier for prop in assumed_type.bl_rna.properties]  # type: ignore
-            if assumed_type is not NoneType
-            else []
+
+        # the handler imports the sockets, which the type determining properties would rebuild
+        handles_sockets = assumed_type is not NoneType and any(
+            identifier in self.plans.of_struct(assumed_type)  # ty: ignore[invalid-argument-type]
+            for identifier in (INPUTS, OUTPUTS)
         )
-        unhandled_prop_ids = [
-            prop.identifier
-            for prop in getter().bl_rna.properties
-            if prop.identifier not in handled_prop_ids
-            and prop.identifier not in [RNA_TYPE]
-        ]
+        type_determining = []
+        unhandled_properties = []
+        for prop in self.plans.unhandled(obj, assumed_type):
+            if prop.is_type_determining:
+                type_determining.append(prop)
+            else:
+                unhandled_properties.append(prop)
 
         def deserializer(
             importer: "Importer",
@@ -400,40 +713,97 @@ From root: {from_root.to_str()}"""
             serialization: dict[str, Any],
             from_root: FromRoot,
         ) -> None:
+            for prop in type_determining:
+                if prop.identifier not in serialization:
+                    continue
+                value = serialization[prop.identifier]
+                # only a change after the sockets were imported would have rebuilt them
+                if handles_sockets and getattr(getter(), prop.identifier) != value:
+                    importer.report.socket_rebuilds_avoided += 1
+                # pylint: disable=protected-access
+                importer._import_property_simple(
+                    getter=getter,
+                    prop=prop,
+                    serialization=value,
+                    from_root=from_root.add_prop(prop),
+                )
+
             specific_handler(importer, getter, serialization, from_root)
 
-            for identifier in unhandled_prop_ids:
-                prop = getter().bl_rna.properties[identifier]
+            for prop in unhandled_properties:
                 prop_from_root = from_root.add_prop(prop)
-                if prop.type in SIMPLE_PROPERTY_TYPES_AS_STRS:
-                    if prop.is_readonly:
-                        if self.debug_prints:
-                            print(f"{prop_from_root.to_str()}: skipping readonly")
-                        continue
+                if prop.is_simple and prop.is_readonly:
+                    if importer.debug_prints:
+                        print(f"{prop_from_root.to_str()}: skipping readonly")
+                    continue
 
                 if prop.identifier not in serialization:
-                    if prop.type in SIMPLE_PROPERTY_TYPES_AS_STRS:
-                        if self.debug_prints:
+                    if prop.missing_policy == MISSING_ASSUME_DEFAULT:
+                        if importer.debug_prints:
                             print(f"{prop_from_root.to_str()}: missing, assume default")
                         continue
-                    if prop.type == PROP_TYPE_POINTER and not prop.is_readonly:
-                        if self.debug_prints:
+                    if prop.missing_policy == MISSING_ASSUME_NOT_SET:
+                        if importer.debug_prints:
                             print(f"{prop_from_root.to_str()}: missing, assume not set")
                         continue
-                    self._error_out(
+                    importer._error_out(
                         getter=getter,
                         reason="missing property in serialization",
                         from_root=prop_from_root,
                     )
 
                 # pylint: disable=protected-access
-                self._import_property(
+                importer._import_property(
                     getter=getter,
                     prop=prop,
-                    serialization=serialization[identifier],
+                    serialization=serialization[prop.identifier],
                     from_root=prop_from_root,
                 )
 
+        return deserializer
+
+    def _import_obj(
+        self,
+        *,
+        getter: GETTER,
+        serialization: dict[str, Any],
+        from_root: FromRoot,
+    ) -> None:
+        getter = self.getter_path(getter)
+        obj = getter()
+
+        if isinstance(obj, bpy.types.Node):
+            self.report.imported_nodes += 1
+        if isinstance(obj, bpy.types.NodeLink):
+            self.report.imported_links += 1
+        if isinstance(obj, bpy.types.NodeTree):
+            self.report.imported_trees += 1
+
+        # edge case for things like bpy_prop_collection that aren't real RNA types?
+        if not hasattr(obj, BL_RNA):
+            assert isinstance(obj, bpy.types.bpy_prop_collection)
+            return self._import_obj_with_deserializer(
+                getter=getter,
+                serialization=serialization,
+                deserializer=self.specific_handlers[NoneType],
+                from_root=from_root,
+            )
+
+        assumed_type = self.dispatch.lookup(obj)
+        if isinstance(obj, bpy.types.bpy_prop_collection) and assumed_type is NoneType:
+            self._error_out(
+                getter=getter,
+                reason="collections must be handled *specifically*",
+                from_root=from_root,
+            )
+
+        # all objects of one RNA type handled by the same handler share this
+        key = (obj.bl_rna.identifier, assumed_type)
+        deserializer = self.deserializers.get(key)
+        if deserializer is None:
+            deserializer = self._make_deserializer(obj=obj, assumed_type=assumed_type)
+            self.deserializers[key] = deserializer
+
         self._import_obj_with_deserializer(
             getter=getter,
             serialization=serialization,
@@ -441,7 +811,13 @@ From root: {from_root.to_str()}"""
             from_root=from_root,
         )
 
-    def _import_node_tree(
+        # the handlers of collections create and remove the items
+        if isinstance(obj, bpy.types.bpy_prop_collection):
+            self.structure_changed()
+
+        self.bulk_written.pop(getter, None)
+
+    def _begin_node_tree(
         self,
         *,
         serialization: dict[str, Any],
@@ -462,8 +838,7 @@ From root: {from_root.to_str()}"""
             name = node_tree.name
             self.report.renames_node_group[original_name] = name
 
-            def getter() -> bpy.types.NodeTree:
-                return bpy.data.node_groups[name]
+            getter = GetterPath.node_group(self, name)
 
         else:
             mat = bpy.data.materials.new(material_name)
@@ -476,26 +851,69 @@ From root: {from_root.to_str()}"""
             name = mat.name
             self.report.rename_material = (original_name, name)
 
-            def getter() -> bpy.types.ShaderNodeTree:
-                return bpy.data.materials[name].node_tree  # type: ignore
+            getter = GetterPath.material(self, name)
 
         if self.debug_prints:
             print(f"{from_root.to_str()}: entering")
 
         self.current_tree = node_tree
-        self._import_obj(
-            getter=getter,
-            serialization=serialization,
-            from_root=from_root,
-        )
-        self.current_tree = None
+        self.current_tree_getter = getter
+        self.node_index = None
+
+        # the handlers emit more instructions in between these
+        assert not self.program
+        for instruction in reversed(
+            [
+                Instruction(
+                    OP_IMPORT_TREE,
+                    lambda: self._import_obj(
+                        getter=getter,
+                        serialization=serialization,
+                        from_root=from_root,
+                    ),
+                ),
+                Instruction(OP_RUN_PHASE, lambda: self.run_phase(PHASE_AFTER_TREE)),
+                Instruction(
+                    OP_FINISH_TREE,
+                    lambda: self._finish_node_tree(getter=getter, from_root=from_root),
+                ),
+            ]
+        ):
+            self.program.emit(instruction)
 
-        for func in self.set_socket_enum_defaults:
-            func()
-        self.set_socket_enum_defaults.clear()
+    def _finish_node_tree(self, *, getter: GETTER, from_root: FromRoot) -> None:
+        self.current_tree = None
+        self.current_tree_getter = None
+        self.node_index = None
 
         self.report.last_getter = getter
 
+        self.report.dispatch_hits = self.dispatch.hits
+        self.report.dispatch_misses = self.dispatch.misses
+        self.report.opcode_counts = dict(self.program.counts)
+        self.report.opcode_seconds = dict(self.program.seconds)
+        if self.debug_prints:
+            print(
+                f"{from_root.to_str()}: handler lookups {self.dispatch.hits} cached, {self.dispatch.misses} resolved"
+            )
+            print(f"{from_root.to_str()}: {self.program.profile_str()}")
+            print(
+                f"{from_root.to_str()}: writes {self.report.writes_performed} performed, {self.report.writes_skipped} skipped"
+            )
+            print(
+                f"{from_root.to_str()}: socket rebuilds avoided {self.report.socket_rebuilds_avoided}"
+            )
+
+    def _import_node_tree(
+        self,
+        *,
+        serialization: dict[str, Any],
+        material_name: str | None = None,
+    ) -> None:
+        self._begin_node_tree(serialization=serialization, material_name=material_name)
+        while self.program:
+            self.program.run_one()
+
 
 def _check_version(data: dict) -> None:
     exporter_blender_version = data[BLENDER_VERSION]
@@ -529,32 +947,53 @@ class ImportParameters:
         *,
         specific_handlers: dict[type, DESERIALIZER],
         debug_prints: bool,
+        skip_unchanged_writes: bool = True,
+        structure_first: bool = False,
     ) -> None:
         self.specific_handlers = specific_handlers
         self.debug_prints = debug_prints
+        self.skip_unchanged_writes = skip_unchanged_writes
+        self.structure_first = structure_first
 
 
-def _from_str(string: str) -> dict[str, Any]:
-    compressed = string.startswith(MAGIC_STRING)
-    if compressed:
-        base64_str = string[len(MAGIC_STRING) :]
-        gzipped = base64.b64decode(base64_str)
-        json_str = gzip.decompress(gzipped).decode("utf-8")
-        return json.loads(json_str)
+def _text_from_str(string: str) -> str | bytes | bytearray:
+    if string.startswith(MAGIC_STRING):
+        reader = CompressedReader()
+        reader.feed_str(string, len(MAGIC_STRING))
+        return reader.finish()
     else:
-        return json.loads(string)
-
+        return string
 
-def _from_file(file_path: Path) -> dict[str, Any]:
-    with file_path.open("r", encoding="utf-8") as file:
-        compressed = file.read(len(MAGIC_STRING)) == MAGIC_STRING
 
-    with file_path.open("r", encoding="utf-8") as file:
-        if compressed:
-            full = file.read()
-            return _from_str(full)
+def _text_from_file(file_path: Path) -> bytes | bytearray:
+    with file_path.open("rb") as file:
+        head = file.read(len(MAGIC_BYTES))
+        if head == MAGIC_BYTES:
+            reader = CompressedReader()
+            reader.feed_file(file)
+            return reader.finish()
         else:
-            return json.load(file)
+            file.seek(0)
+            return file.read()
+
+
+def _parse(text: str | bytes | bytearray, lazy: bool) -> dict[str, Any]:
+    if lazy:
+        if not isinstance(text, str):
+            text = text.decode("utf-8")
+        try:
+            return parse_lazily(text)
+        except ValueError:
+            # not written by our exporter, it might still be valid JSON
+            pass
+    # json detects the encoding of bytes by itself
+    return json.loads(text)
+
+
+def _count_objects(tree: dict[str, Any]) -> int:
+    return len(tree[DATA][NODE_TREE_NODES][DATA][ITEMS]) + len(
+        tree[DATA][NODE_TREE_LINKS][DATA][ITEMS]
+    )
 
 
 class ImportIntermediate:
@@ -563,14 +1002,43 @@ class ImportIntermediate:
         *,
         string: str | None = None,
         file_path: Path | None = None,
+        lazy: bool = False,
+        background: bool = False,
     ) -> None:
+        """With lazy, only the top level is parsed up front and each tree when it's imported.
+        With background, decoding and parsing happen in a worker thread, see wait_loaded."""
         if not xor(string is None, file_path is None):
             raise RuntimeError("Either provide string xor file_path")
 
-        if string is not None:
-            self.data = _from_str(string)
-        if file_path is not None:
-            self.data = _from_file(file_path)
+        def load() -> dict[str, Any]:
+            # this must not touch bpy, it might run in the worker thread
+            if string is not None:
+                return _parse(_text_from_str(string), lazy)
+            assert file_path is not None
+            return _parse(_text_from_file(file_path), lazy)
+
+        self.loading: Future[dict[str, Any]] | None = None
+        if background:
+            executor = ThreadPoolExecutor(max_workers=1)
+            self.loading = executor.submit(load)
+            executor.shutdown(wait=False)
+        else:
+            self._loaded(load())
+
+    def wait_loaded(self, timeout: float | None = None) -> bool:
+        """Returns False if the worker thread isn't done within timeout seconds.
+        Errors from decoding and parsing are raised here."""
+        if self.loading is not None:
+            try:
+                data = self.loading.result(timeout)
+            except FutureTimeoutError:
+                return False
+            self.loading = None
+            self._loaded(data)
+        return True
+
+    def _loaded(self, data: dict[str, Any]) -> None:
+        self.data = data
 
         _check_version(self.data)
 
@@ -578,9 +1046,26 @@ class ImportIntermediate:
             raise RuntimeError("There appear to be no trees to be imported")
 
         self.getters: dict[int, GETTER] = {}
-        self.total_steps = len(self.data[TREES])
+
+        # progress is counted in nodes and links, that's what takes time
+        self.total_objects: int | None
+        if isinstance(self.data[TREES], LazyTrees):
+            # these are only known per tree, once it's parsed
+            self.total_objects = None
+            self.current_tree_objects = 0
+            self.objects_before_current_tree = 0
+            self.total_steps = self.data[TREES].total_size + 1
+        else:
+            self.total_objects = sum(_count_objects(tree) for tree in self.data[TREES])
+            self.total_steps = self.total_objects + 1
+        self.finished = False
+
+        # all trees are there, only values might still be missing, see ImportParameters.structure_first
+        self.structure_finished = False
+        self.values_total = 0
 
     def get_external(self) -> dict[str, EXTERNAL_SERIALIZATION]:
+        assert self.loading is None, "Call wait_loaded first"
         assert isinstance(self.data, dict)
         return self.data[EXTERNAL]
 
@@ -620,18 +1105,53 @@ class ImportIntermediate:
                 assert int(external_id) in self.getters
 
     def start_import(self, parameters: ImportParameters) -> None:
+        assert self.loading is None, "Call wait_loaded first"
         self.importer = Importer(
             specific_handlers=parameters.specific_handlers,
             getters=self.getters,
             debug_prints=parameters.debug_prints,
+            skip_unchanged_writes=parameters.skip_unchanged_writes,
+            structure_first=parameters.structure_first,
         )
+        self.throughput = Throughput()
 
-    def step(self) -> bool:
+    def step(self, budget_ms: float = 0) -> bool:
+        """Import for roughly budget_ms milliseconds, but at least one piece.
+        Returns False once everything is imported."""
         assert isinstance(self.importer, Importer)
+        deadline = time.perf_counter() + budget_ms / 1000
+        # the UI, the depsgraph or even undo ran in between, don't trust old references
+        self.importer.new_step()
+        while self._step_once():
+            if time.perf_counter() >= deadline:
+                return True
+        return False
+
+    def _step_once(self) -> bool:
+        if self.importer.program:
+            # the UI had a chance to run in between, don't trust old references
+            if self.importer.current_tree_getter is not None:
+                self.importer.current_tree = self.importer.current_tree_getter()
+            self.importer.program.run_one()
+            return True
+
         if not self.data[TREES]:
+            if not self.structure_finished:
+                self.structure_finished = True
+                self.values_total = self.importer.program.schedule_phase(PHASE_FILL)
+                if self.values_total:
+                    return True
+            if self.values_total:
+                report = self.importer.report
+                report.opcode_counts = dict(self.importer.program.counts)
+                report.opcode_seconds = dict(self.importer.program.seconds)
+            self.finished = True
             return False
 
         tree = self.data[TREES].pop(0)
+        if self.total_objects is None:
+            self.current_tree_objects = _count_objects(tree)
+            self.objects_before_current_tree = self.objects_done()
 
         # root tree needs special treatment, might be material
         if not self.data[TREES] and MATERIAL_NAME in self.data:
@@ -639,15 +1159,78 @@ class ImportIntermediate:
         else:
             material_name = None
 
-        self.importer._import_node_tree(
+        self.importer._begin_node_tree(
             serialization=tree,
             material_name=material_name,
         )
 
         return True
 
+    def objects_done(self) -> int:
+        report = self.importer.report
+        done = report.imported_nodes + report.imported_links
+        if self.total_objects is None:
+            return done
+        return min(done, self.total_objects)
+
     def progress(self) -> int:
-        return self.total_steps - len(self.data[TREES])
+        if self.finished:
+            return self.total_steps
+        if self.total_objects is None:
+            return self._lazy_progress()
+        return self.objects_done()
+
+    def _lazy_progress(self) -> int:
+        """The characters of the trees that are done, and the part of the current one"""
+        trees = self.data[TREES]
+        assert isinstance(trees, LazyTrees)
+        if self.current_tree_objects == 0:
+            return trees.size_before_current
+        done = self.objects_done() - self.objects_before_current_tree
+        fraction = min(done / self.current_tree_objects, 1.0)
+        return trees.size_before_current + int(trees.current_size * fraction)
+
+    def status(self) -> str:
+        if self.structure_finished and self.values_total:
+            values_done = self.values_total - len(self.importer.program.pending)
+            return f"Filling in values: {values_done}/{self.values_total}"
+        if self.total_objects is None:
+            trees = self.data[TREES]
+            assert isinstance(trees, LazyTrees)
+            eta = self.throughput.eta(self._lazy_progress(), trees.total_size)
+            eta_str = "?" if eta is None else f"{eta:.0f}s"
+            return f"Importing: tree {trees.taken}/{trees.count}, {self.objects_done()} objects, {eta_str} left"
+        return "Importing: " + self.throughput.describe(
+            self.objects_done(), self.total_objects
+        )
+
+    def cancel(self) -> None:
+        """Stop importing and remove what was created so far, half a tree is of no use.
+        Once the structure is finished, the trees might already be in use, see ImportParameters.structure_first.
+        Then only the filling in of values stops and the trees are kept."""
+        assert isinstance(self.importer, Importer)
+        keep = self.structure_finished
+        self.importer.program.clear()
+        self.importer.zone_pairings.clear()
+        self.importer.node_parents.clear()
+        self.importer.node_index = None
+        self.importer.current_tree = None
+        self.importer.current_tree_getter = None
+        self.data[TREES].clear()
+        self.finished = True
+
+        if keep:
+            return
+
+        report = self.importer.report
+        for name in report.renames_node_group.values():
+            node_group = bpy.data.node_groups.get(name)
+            if node_group is not None:
+                bpy.data.node_groups.remove(node_group)
+        if report.rename_material is not None:
+            material = bpy.data.materials.get(report.rename_material[1])
+            if material is not None:
+                bpy.data.materials.remove(material)
 
     def import_all(self, parameters: ImportParameters) -> ImportReport:
         self.start_import(parameters)
@@ -0,0 +1,101 @@
+import time
+
+from typing import Callable
+
+# what an instruction does, mostly for profiling and debugging
+OP_IMPORT_TREE = "IMPORT_TREE"
+OP_IMPORT_NODE = "IMPORT_NODE"
+OP_IMPORT_LINK = "IMPORT_LINK"
+OP_IMPORT_ITEM = "IMPORT_ITEM"
+OP_END_PASS = "END_PASS"
+OP_RUN_PHASE = "RUN_PHASE"
+OP_SET_PARENTS = "SET_PARENTS"
+OP_PAIR_ZONES = "PAIR_ZONES"
+OP_ZONE_SOCKETS = "ZONE_SOCKETS"
+OP_UPDATE_CURVE = "UPDATE_CURVE"
+OP_SET_AUTO_REMOVE = "SET_AUTO_REMOVE"
+OP_SET_ENUM_DEFAULT = "SET_ENUM_DEFAULT"
+OP_FINISH_TREE = "FINISH_TREE"
+OP_FILL_VALUE = "FILL_VALUE"
+OP_CALL = "CALL"  # anything else
+
+# the points in a tree's import where collected instructions are run
+PHASE_AFTER_NODES = "after_nodes"  # all nodes exist, but no links yet
+PHASE_AFTER_LINKS = "after_links"  # all links exist
+PHASE_AFTER_TREE = "after_tree"  # everything else is done
+PHASE_FILL = "fill"  # the structure of all trees is done, see Importer.structure_first
+PHASES = [PHASE_AFTER_NODES, PHASE_AFTER_LINKS, PHASE_AFTER_TREE, PHASE_FILL]
+
+
+class Instruction:
+    """One unit of the import program, small enough to not block the UI"""
+
+    __slots__ = ("opcode", "func")
+
+    def __init__(self, opcode: str, func: Callable[[], None]) -> None:
+        self.opcode = opcode
+        self.func = func
+
+
+class ImportProgram:
+    """The instructions of the tree that is currently imported.
+
+    The pending ones are a stack, instructions emitted while one runs are
+    executed next, in the order they were emitted.
+    Instructions that need a later phase are collected until that phase is run."""
+
+    def __init__(self) -> None:
+        self.pending: list[Instruction] = []
+        self.phases: dict[str, list[Instruction]] = {phase: [] for phase in PHASES}
+
+        # per opcode, how often it ran and how long it took in total
+        self.counts: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.pending)
+
+    def emit(self, instruction: Instruction) -> None:
+        self.pending.append(instruction)
+
+    def emit_in_phase(self, phase: str, instruction: Instruction) -> None:
+        self.phases[phase].append(instruction)
+
+    def take_phase(self, phase: str) -> list[Instruction]:
+        instructions = self.phases[phase]
+        self.phases[phase] = []
+        return instructions
+
+    def schedule_phase(self, phase: str) -> int:
+        """Make the phase's instructions pending, in the order they were emitted"""
+        instructions = self.take_phase(phase)
+        self.pending.extend(reversed(instructions))
+        return len(instructions)
+
+    def run_one(self) -> None:
+        instruction = self.pending.pop()
+        before = len(self.pending)
+
+        start = time.perf_counter()
+        instruction.func()
+        elapsed = time.perf_counter() - start
+
+        opcode = instruction.opcode
+        self.counts[opcode] = self.counts.get(opcode, 0) + 1
+        self.seconds[opcode] = self.seconds.get(opcode, 0.0) + elapsed
+
+        # keep the order in which they were emitted
+        self.pending[before:] = reversed(self.pending[before:])
+
+    def clear(self) -> None:
+        self.pending.clear()
+        for instructions in self.phases.values():
+            instructions.clear()
+
+    def profile_str(self) -> str:
+        return ", ".join(
+            f"{opcode} {self.counts[opcode]}x {seconds * 1000:.1f}ms"
+            for opcode, seconds in sorted(
+                self.seconds.items(), key=lambda item: item[1], reverse=True
+            )
+        )
@@ -0,0 +1,174 @@
+import json
+import re
+
+from typing import Any
+
+from .common import TREE_SPANS, TREES
+
+# the next bracket that isn't within a string, strings are skipped as a whole
+_NEXT_BRACKET = re.compile(r'[^"\[\]{}]*(?:"(?:[^"\\]|\\.)*"[^"\[\]{}]*)*([\[\]{}])')
+_WHITESPACE = re.compile(r"\s*")
+
+_DECODER = json.JSONDecoder()
+
+
+def _skip_whitespace(text: str, index: int) -> int:
+    return _WHITESPACE.match(text, index).end()  # ty: ignore[possibly-missing-attribute]
+
+
+def _expect(text: str, index: int, char: str) -> int:
+    index = _skip_whitespace(text, index)
+    if text[index : index + 1] != char:
+        raise ValueError(f"Expected {char!r} at {index}")
+    return index + 1
+
+
+def _end_of_value(text: str, index: int) -> int:
+    """Where the JSON value starting at index ends, without building it"""
+    if text[index : index + 1] not in ("{", "["):
+        return _DECODER.raw_decode(text, index)[1]
+
+    depth = 0
+    for match in _NEXT_BRACKET.finditer(text, index):
+        if match.group(1) in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise ValueError(f"Unterminated value at {index}")
+
+
+def _recorded_spans(text: str) -> list[tuple[int, int]] | None:
+    """The spans the exporter writes as the last key, if they're there and plausible"""
+    index = text.rfind(json.dumps(TREE_SPANS))
+    if index < 0:
+        return None
+    try:
+        index = _DECODER.raw_decode(text, index)[1]
+        index = _expect(text, index, ":")
+        spans, index = _DECODER.raw_decode(text, _skip_whitespace(text, index))
+        index = _expect(text, index, "}")
+    except ValueError:
+        return None
+    if _skip_whitespace(text, index) != len(text):
+        return None
+
+    previous_end = 0
+    for span in spans:
+        if not (
+            isinstance(span, list)
+            and len(span) == 2
+            and all(isinstance(offset, int) for offset in span)
+        ):
+            return None
+        start, end = span
+        if not previous_end <= start < end <= index:
+            return None
+        if text[start] != "{" or text[end - 1] != "}":
+            return None
+        # consecutive trees are separated by a comma, parse_lazily checks the array's ends
+        if previous_end and text[previous_end:start].strip() != ",":
+            return None
+        previous_end = end
+    return [(start, end) for start, end in spans]
+
+
+def _recorded_fit(text: str, spans: list[tuple[int, int]], index: int) -> bool:
+    """Whether the spans fill the array whose first element starts at index"""
+    after = _skip_whitespace(text, spans[-1][1])
+    return spans[0][0] == index and text[after : after + 1] == "]"
+
+
+class LazyTrees:
+    """The trees of a payload, only located at first. Each is parsed when it's taken,
+    so only one of them exists as Python objects at a time."""
+
+    def __init__(self, text: str, spans: list[tuple[int, int]]) -> None:
+        self.text = text
+        self.spans = spans
+
+        # progress is counted in characters, how many objects a tree has is only known once it's parsed
+        self.count = len(spans)
+        self.taken = 0
+        self.total_size = sum(end - start for start, end in spans)
+        self.size_before_current = 0
+        self.current_size = 0
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def pop(self, index: int = -1) -> dict[str, Any]:
+        # only the next one is ever needed, see ImportIntermediate._step_once
+        assert index == 0
+        start, end = self.spans.pop(0)
+        tree, parsed_end = _DECODER.raw_decode(self.text, start)
+        if parsed_end != end:
+            raise ValueError(f"The tree at {start} doesn't end at {end} but at {parsed_end}")
+
+        self.taken += 1
+        self.size_before_current += self.current_size
+        self.current_size = end - start
+        return tree
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+def parse_lazily(text: str) -> dict[str, Any]:
+    """Parse everything but the trees, they become LazyTrees.
+    Where the trees are is read from TREE_SPANS, older payloads are scanned for them.
+    Raises ValueError if the payload doesn't look the way the exporter writes it."""
+    data: dict[str, Any] = {}
+    spans: list[tuple[int, int]] = []
+    recorded = _recorded_spans(text)
+
+    index = _expect(text, 0, "{")
+    index = _skip_whitespace(text, index)
+    if text[index : index + 1] == "}":
+        raise ValueError("Empty payload")
+
+    while True:
+        index = _skip_whitespace(text, index)
+        key, index = _DECODER.raw_decode(text, index)
+        if not isinstance(key, str):
+            raise ValueError(f"Expected a key before {index}")
+        index = _expect(text, index, ":")
+        index = _skip_whitespace(text, index)
+
+        if key == TREES:
+            index = _expect(text, index, "[")
+            index = _skip_whitespace(text, index)
+            if text[index : index + 1] == "]":
+                index += 1
+            elif recorded and _recorded_fit(text, recorded, index):
+                spans = recorded
+                index = _expect(text, spans[-1][1], "]")
+            else:
+                while True:
+                    index = _skip_whitespace(text, index)
+                    end = _end_of_value(text, index)
+                    spans.append((index, end))
+                    index = _skip_whitespace(text, end)
+                    if text[index : index + 1] == "]":
+                        index += 1
+                        break
+                    index = _expect(text, index, ",")
+            data[TREES] = None
+        elif key == TREE_SPANS:
+            index = _end_of_value(text, index)
+        else:
+            data[key], index = _DECODER.raw_decode(text, index)
+
+        index = _skip_whitespace(text, index)
+        if text[index : index + 1] == "}":
+            break
+        index = _expect(text, index, ",")
+
+    if _skip_whitespace(text, index + 1) != len(text):
+        raise ValueError("Extra data after the payload")
+    if TREES not in data:
+        raise ValueError("No trees in the payload")
+
+    data[TREES] = LazyTrees(text, spans)
+    return data
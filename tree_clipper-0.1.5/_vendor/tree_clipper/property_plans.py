@@ -0,0 +1,228 @@
+import bpy
+
+from types import NoneType
+from typing import Type
+
+from .common import (
+    DEFAULT_VALUE,
+    DIMENSIONS,
+    DISPLAY_SHAPE,
+    FORBIDDEN_PROPERTIES,
+    LOCATION,
+    NAME,
+    PROP_TYPE_BOOLEAN,
+    PROP_TYPE_ENUM,
+    PROP_TYPE_FLOAT,
+    PROP_TYPE_INT,
+    PROP_TYPE_POINTER,
+    RNA_TYPE,
+    SIMPLE_PROPERTY_TYPES_AS_STRS,
+)
+
+# what to do on import if the serialization doesn't have a value for a property
+MISSING_ASSUME_DEFAULT = "assume default"
+MISSING_ASSUME_NOT_SET = "assume not set"
+MISSING_ERROR = "error"
+
+_SOCKET_TYPES = (bpy.types.NodeSocket, bpy.types.NodeTreeInterfaceSocket)
+
+# in a structure first import these are written right away, so the graph is recognizable
+_STRUCTURE_FIRST = {NAME, LOCATION}
+
+# writing these rebuilds the owner's sockets with other types, so they're written before anything else
+# (RNA identifier of the owner or one of its bases, property identifier)
+TYPE_DETERMINING = {
+    ("FunctionNodeCompare", "data_type"),
+    ("FunctionNodeHashValue", "data_type"),
+    ("FunctionNodeRandomValue", "data_type"),
+    ("GeometryNodeAccumulateField", "data_type"),
+    ("GeometryNodeAttributeStatistic", "data_type"),
+    ("GeometryNodeBlurAttribute", "data_type"),
+    ("GeometryNodeFieldAtIndex", "data_type"),
+    ("GeometryNodeFieldOnDomain", "data_type"),
+    ("GeometryNodeIndexSwitch", "data_type"),
+    ("GeometryNodeInputNamedAttribute", "data_type"),
+    ("GeometryNodeMenuSwitch", "data_type"),
+    ("GeometryNodeRaycast", "data_type"),
+    ("GeometryNodeSampleIndex", "data_type"),
+    ("GeometryNodeSampleNearestSurface", "data_type"),
+    ("GeometryNodeSampleUVSurface", "data_type"),
+    ("GeometryNodeStoreNamedAttribute", "data_type"),
+    ("GeometryNodeSwitch", "input_type"),
+    ("GeometryNodeViewer", "data_type"),
+    ("ShaderNodeMapRange", "data_type"),
+    ("ShaderNodeMix", "data_type"),
+    ("NodeTreeInterfaceSocket", "socket_type"),
+}
+
+# the values that may be written with one foreach_set for a whole collection on import,
+# anything else might depend on the order the handlers write it in, see bulk_arrays.bulk_write
+# (RNA identifier of the owner or one of its bases, property identifier)
+BULK_WRITABLE = {
+    ("Node", "location"),
+    ("Node", "width"),
+    ("ColorRampElement", "position"),
+    ("ColorRampElement", "color"),
+    ("NodeSocket", "default_value"),
+    ("CurveMapPoint", "location"),
+}
+
+
+class PropertyPlan:
+    """Everything the exporter and importer need to know about one property.
+    Reading these from RNA is surprisingly expensive, so we do it once per type."""
+
+    def __init__(
+        self, prop: bpy.types.Property, *, owners: list[str], owner_is_socket: bool
+    ) -> None:
+        """owners are the RNA identifiers of the owning type and all its bases"""
+        # the actual RNA property, in case something isn't precomputed
+        self.prop = prop
+
+        self.identifier: str = prop.identifier
+        self.type: str = prop.type
+        self.is_readonly: bool = prop.is_readonly
+        self.is_simple = self.type in SIMPLE_PROPERTY_TYPES_AS_STRS
+        self.is_forbidden = self.identifier in FORBIDDEN_PROPERTIES
+        self.is_array: bool = getattr(prop, "is_array", False)
+        self.is_enum = self.type == PROP_TYPE_ENUM
+        self.is_enum_flag: bool = self.is_enum and prop.is_enum_flag  # ty: ignore[unresolved-attribute]
+
+        # https://github.com/Algebraic-UG/tree_clipper/issues/96
+        self.hard_min: int | float | None = None
+        self.hard_max: int | float | None = None
+        if self.type in [PROP_TYPE_INT, PROP_TYPE_FLOAT]:
+            self.hard_min = prop.hard_min  # ty: ignore[unresolved-attribute]
+            self.hard_max = prop.hard_max  # ty: ignore[unresolved-attribute]
+
+        # how many values foreach_get yields per item, None if it can't be used
+        self.flat_length: int | None = None
+        if self.type in [PROP_TYPE_BOOLEAN, PROP_TYPE_INT, PROP_TYPE_FLOAT]:
+            if not self.is_array:
+                self.flat_length = 1
+            else:
+                dimensions = [d for d in prop.array_dimensions if d != 0]  # ty: ignore[unresolved-attribute]
+                # dynamic and multi-dimensional arrays are left to getattr
+                if len(dimensions) == 1 and prop.array_length == dimensions[0]:  # ty: ignore[unresolved-attribute]
+                    self.flat_length = dimensions[0]
+
+        # pointers and collections
+        self.fixed_type = getattr(prop, "fixed_type", None)
+        self.fixed_type_name: str | None = None
+        if self.type == PROP_TYPE_POINTER and self.fixed_type is not None:
+            self.fixed_type_name = self.fixed_type.bl_rna.identifier
+
+        # https://github.com/Algebraic-UG/tree_clipper/issues/48
+        self.is_broken_display_shape = (
+            bpy.app.version == (5, 0, 0) and self.identifier == DISPLAY_SHAPE
+        )
+
+        # this depends on the collection's RNA, so we only know once we meet one
+        self.collection_needs_specific_handler: bool | None = None
+
+        # for sockets' default enum values we need to defer on import
+        # first, we link everything up, then set the default values
+        self.is_socket_enum_default = (
+            owner_is_socket and self.is_enum and self.identifier == DEFAULT_VALUE
+        )
+
+        self.is_type_determining = (
+            self.is_simple
+            and not self.is_readonly
+            and any((owner, self.identifier) in TYPE_DETERMINING for owner in owners)
+        )
+
+        self.is_bulk_writable = any(
+            (owner, self.identifier) in BULK_WRITABLE for owner in owners
+        )
+
+        # writing these can make Blender rebuild sockets or items, see Importer.structure_changed
+        self.changes_structure = (
+            self.is_enum or self.type == PROP_TYPE_POINTER or self.identifier == DIMENSIONS
+        )
+
+        # nothing else depends on these, so they can be written once all trees have their structure
+        self.can_fill_later = (
+            self.is_simple
+            and not self.changes_structure
+            and not self.is_type_determining
+            and self.identifier not in _STRUCTURE_FIRST
+        )
+
+        if self.is_simple:
+            self.missing_policy = MISSING_ASSUME_DEFAULT
+        elif self.type == PROP_TYPE_POINTER and not self.is_readonly:
+            self.missing_policy = MISSING_ASSUME_NOT_SET
+        else:
+            self.missing_policy = MISSING_ERROR
+
+
+class PropertyPlans:
+    """Caches the property plans per RNA type, and the derived lists per handled type"""
+
+    def __init__(self) -> None:
+        self._of_struct: dict[str, dict[str, PropertyPlan]] = {}
+        self._simple_writable: dict[type, list[PropertyPlan]] = {}
+        self._unhandled: dict[tuple[str, type], list[PropertyPlan]] = {}
+
+    def of_struct(
+        self, struct: bpy.types.bpy_struct | Type[bpy.types.bpy_struct]
+    ) -> dict[str, PropertyPlan]:
+        bl_rna = struct.bl_rna  # ty: ignore[unresolved-attribute]
+        plans = self._of_struct.get(bl_rna.identifier)
+        if plans is None:
+            if isinstance(struct, type):
+                owner_is_socket = issubclass(struct, _SOCKET_TYPES)
+            else:
+                owner_is_socket = isinstance(struct, _SOCKET_TYPES)
+            owners = []
+            base = bl_rna
+            while base is not None:
+                owners.append(base.identifier)
+                base = base.base
+            plans = {
+                prop.identifier: PropertyPlan(
+                    prop, owners=owners, owner_is_socket=owner_is_socket
+                )
+                for prop in bl_rna.properties
+            }
+            self._of_struct[bl_rna.identifier] = plans
+        return plans
+
+    def simple_writable(
+        self, assumed_type: Type[bpy.types.bpy_struct]
+    ) -> list[PropertyPlan]:
+        plans = self._simple_writable.get(assumed_type)
+        if plans is None:
+            plans = [
+                plan
+                for plan in self.of_struct(assumed_type).values()
+                if not plan.is_readonly and plan.is_simple
+            ]
+            # stable, so the rest keeps the RNA order
+            plans.sort(key=lambda plan: not plan.is_type_determining)
+            self._simple_writable[assumed_type] = plans
+        return plans
+
+    def unhandled(
+        self,
+        obj: bpy.types.bpy_struct,
+        assumed_type: type,
+    ) -> list[PropertyPlan]:
+        """The properties of obj that the handler for assumed_type doesn't know about"""
+        key = (obj.bl_rna.identifier, assumed_type)
+        plans = self._unhandled.get(key)
+        if plans is None:
+            handled_prop_ids = (
+                set(self.of_struct(assumed_type).keys())  # ty: ignore[invalid-argument-type]
+                if assumed_type is not NoneType
+                else set()
+            )
+            plans = [
+                plan
+                for plan in self.of_struct(obj).values()
+                if plan.identifier not in handled_prop_ids
+                and plan.identifier != RNA_TYPE
+            ]
+            self._unhandled[key] = plans
+        return plans
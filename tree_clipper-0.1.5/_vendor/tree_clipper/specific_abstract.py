@@ -7,7 +7,7 @@ from abc import ABC, abstractmethod
 from typing import Any, Callable, Generic, TypeVar, ClassVar, Type
 
 
-from .common import FromRoot, no_clobber
+from .common import FromRoot, HandlerTable, no_clobber
 from .export_nodes import Exporter
 from .import_nodes import GETTER, Importer
 
@@ -33,12 +33,16 @@ def default_deserializer(
 
 
 # these are filled either manually, or by defining subclasses of the abstract ones below
-_BUILT_IN_EXPORTER = {
-    NoneType: default_serializer,
-}
-_BUILT_IN_IMPORTER = {
-    NoneType: default_deserializer,
-}
+_BUILT_IN_EXPORTER = HandlerTable(
+    {
+        NoneType: default_serializer,
+    }
+)
+_BUILT_IN_IMPORTER = HandlerTable(
+    {
+        NoneType: default_deserializer,
+    }
+)
 
 
 class SpecificExporter(Generic[AssumedType], ABC):
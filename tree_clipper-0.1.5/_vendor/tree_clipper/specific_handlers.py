@@ -1,6 +1,6 @@
 import bpy
 
-from typing import Type
+from typing import Any, Callable, Type
 
 from .specific_abstract import (
     _BUILT_IN_EXPORTER,
@@ -9,7 +9,27 @@ from .specific_abstract import (
     SpecificImporter,
 )
 
+from .getter_path import GetterPath, ItemsPass
+from .import_program import (
+    OP_PAIR_ZONES,
+    OP_RUN_PHASE,
+    OP_SET_AUTO_REMOVE,
+    OP_SET_PARENTS,
+    OP_UPDATE_CURVE,
+    PHASE_AFTER_LINKS,
+    PHASE_AFTER_NODES,
+    PHASE_FILL,
+)
+
+from .import_nodes import Importer
 from .common import (
+    GETTER,
+    INPUTS,
+    LOCATION,
+    OUTPUTS,
+    FromRoot,
+    NODE_TREE_LINKS,
+    NODE_TREE_NODES,
     DATA,
     DIMENSIONS,
     ID,
@@ -18,7 +38,6 @@ from .common import (
     BL_IDNAME,
     NAME,
     DEFAULT_VALUE,
-    GETTER,
     NODE_TREE,
 )
 
@@ -32,7 +51,6 @@ DESCRIPTION = "description"
 ENUM_ITEMS = "enum_items"
 FROM_NODE = "from_node"
 FROM_SOCKET = "from_socket"
-INPUTS = "inputs"
 IN_OUT = "in_out"
 ITEM_TYPE = "item_type"
 ITEM_TYPE_SOCKET = "SOCKET"
@@ -40,9 +58,6 @@ ITEM_TYPE_PANEL = "PANEL"
 ITEMS_TREE = "items_tree"
 MULTI_INPUT_SORT_ID = "multi_input_sort_id"
 NODE_TREE_INTERFACE = "interface"
-NODE_TREE_LINKS = "links"
-NODE_TREE_NODES = "nodes"
-OUTPUTS = "outputs"
 PAIRED_OUTPUT = "paired_output"
 PARENT = "parent"
 PARENT_INDEX = "parent_index"
@@ -53,7 +68,7 @@ TO_NODE = "to_node"
 TO_SOCKET = "to_socket"
 VIEWER_ITEMS = "viewer_items"
 ANNOTATION = "annotation"
-LOCATION = "location"
+POSITION = "position"
 CURVES = "curves"
 DISPLAY_SETTINGS = "display_settings"
 DISPLAY_DEVICE = "display_device"
@@ -101,6 +116,123 @@ def _or_default(serialization: dict, ty: Type[bpy.types.bpy_struct], identifier:
     return serialization.get(identifier, ty.bl_rna.properties[identifier].default)  # ty: ignore[unresolved-attribute]
 
 
+def _sync_items(
+    *,
+    existing: list[bpy.types.bpy_struct],
+    wanted: list[tuple],
+    key_of: Callable[[bpy.types.bpy_struct], tuple],
+    remove: Callable[[bpy.types.bpy_struct], None],
+    new: Callable[[tuple], None],
+    ordered: bool = True,
+    keep_one: bool = False,
+) -> tuple[int, int, int]:
+    """Make the items match the wanted keys, keeping the ones that already do.
+    For ordered collections only the matching prefix can stay,
+    collections that sort themselves can keep any matching item.
+    With keep_one, the collection is never empty and never larger than before or after.
+    Returns how many items were kept, removed and created."""
+    if ordered:
+        keep = 0
+        while (
+            keep < min(len(existing), len(wanted))
+            and key_of(existing[keep]) == wanted[keep]
+        ):
+            keep += 1
+        stale = existing[keep:]
+        missing = wanted[keep:]
+    else:
+        unmatched: dict[tuple, int] = {}
+        for key in wanted:
+            unmatched[key] = unmatched.get(key, 0) + 1
+        stale = []
+        for item in existing:
+            key = key_of(item)
+            if unmatched.get(key, 0) > 0:
+                unmatched[key] -= 1
+            else:
+                stale.append(item)
+        missing = []
+        for key in wanted:
+            if unmatched.get(key, 0) > 0:
+                unmatched[key] -= 1
+                missing.append(key)
+
+    # stale ones are removed first, collections like color ramps have a maximum size
+    held = None
+    if keep_one and stale and len(stale) == len(existing):
+        # nothing can stay, but one has to remain until the first new one exists
+        held = stale[-1]
+        stale = stale[:-1]
+    for item in reversed(stale):
+        remove(item)
+    if held is not None:
+        new(missing[0])
+        remove(held)
+        stale.append(held)
+        missing_after = missing[1:]
+    else:
+        missing_after = missing
+    for key in missing_after:
+        new(key)
+
+    return len(existing) - len(stale), len(stale), len(missing)
+
+
+def _sync_collection(
+    specific_importer: SpecificImporter,
+    *,
+    wanted: list[tuple],
+    key_of: Callable[[bpy.types.bpy_struct], tuple],
+    new: Callable[[bpy.types.bpy_prop_collection, tuple], None],
+) -> None:
+    """For the items collections of nodes, every change makes Blender rebuild the sockets,
+    so we only touch what differs instead of clearing and adding everything"""
+    collection = specific_importer.getter()
+    existing = list(collection)
+    if existing and not any(key_of(existing[0]) == key for key in wanted[:1]):
+        # nothing can stay, one call is enough
+        collection.clear()
+        existing = []
+
+    kept, removed, created = _sync_items(
+        existing=existing,
+        wanted=wanted,
+        key_of=key_of,
+        remove=collection.remove,
+        new=lambda key: new(collection, key),
+    )
+    if specific_importer.importer.debug_prints:
+        print(
+            f"{specific_importer.from_root.to_str()}: kept {kept}, removed {removed}, created {created}"
+        )
+
+
+def _sync_socket_items(
+    specific_importer: SpecificImporter,
+    *,
+    item_type: Type[bpy.types.bpy_struct],
+    type_identifier: str = SOCKET_TYPE,
+    to_socket_type: Callable[[str], str] = lambda socket_type: socket_type,
+) -> None:
+    """The common case, items with a name and a type that are created with new(socket_type, name)"""
+
+    def key(data: dict) -> tuple:
+        return (
+            _or_default(data, item_type, NAME),
+            to_socket_type(_or_default(data, item_type, type_identifier)),
+        )
+
+    _sync_collection(
+        specific_importer,
+        wanted=[key(item[DATA]) for item in specific_importer.serialization[ITEMS]],
+        key_of=lambda item: (
+            item.name,
+            to_socket_type(getattr(item, type_identifier)),
+        ),
+        new=lambda collection, key: collection.new(socket_type=key[1], name=key[0]),
+    )
+
+
 def _import_node_parent(specific_importer: SpecificImporter) -> None:
     assert isinstance(specific_importer.getter(), bpy.types.Node)
 
@@ -110,12 +242,9 @@ def _import_node_parent(specific_importer: SpecificImporter) -> None:
 
     assert isinstance(parent_id, int)
 
-    def deferred():
-        specific_importer.getter().parent = specific_importer.importer.getters[
-            parent_id
-        ]()  # ty: ignore[invalid-assignment]
-
-    specific_importer.importer.defer_after_nodes_before_links.append(deferred)
+    specific_importer.importer.defer_node_parent(
+        getter=specific_importer.getter, parent_id=parent_id
+    )
 
 
 # Possible socket data types: https://docs.blender.org/api/current/bpy_types_enum_items/node_socket_data_type_items.html#rna-enum-node-socket-data-type-items
@@ -160,8 +289,26 @@ class NodeTreeExporter(SpecificExporter[bpy.types.NodeTree]):
         )
 
         link_items = []
+        no_clobber(links[DATA], ITEMS, link_items)
         for i, link in enumerate(self.obj.links):
-            from_root_link = self.from_root.add(f"[{i}] (unnamed)")
+            # there can be a lot of links, the exporter decides when to do this
+            self.exporter.defer(
+                self._make_link_work(link_items=link_items, i=i, link=link)
+            )
+
+        no_clobber(data, NODE_TREE_LINKS, links)
+
+        return data
+
+    def _make_link_work(
+        self,
+        *,
+        link_items: list[dict[str, Any]],
+        i: int,
+        link: bpy.types.NodeLink,
+    ) -> Callable[[], None]:
+        def work() -> None:
+            from_root_link = self.from_root.add_item(i)
 
             if (
                 isinstance(link.from_node, bpy.types.CompositorNodeRLayers)
@@ -173,7 +320,7 @@ class NodeTreeExporter(SpecificExporter[bpy.types.NodeTree]):
                 self.exporter.report.warnings.append(warning)
                 if self.exporter.debug_prints:
                     print(warning)
-                continue
+                return
 
             link_items.append(
                 self.exporter._export_obj(
@@ -182,10 +329,7 @@ class NodeTreeExporter(SpecificExporter[bpy.types.NodeTree]):
                 )
             )
 
-        no_clobber(links[DATA], ITEMS, link_items)
-        no_clobber(data, NODE_TREE_LINKS, links)
-
-        return data
+        return work
 
 
 class NodeTreeImporter(SpecificImporter[bpy.types.NodeTree]):
@@ -200,18 +344,22 @@ class NodeTreeImporter(SpecificImporter[bpy.types.NodeTree]):
             [NODE_TREE_INTERFACE, NODE_TREE_NODES, ANNOTATION]
         )
 
-        # one thing that requires this is the repeat zone
-        # after this more sockets are available for linking
-        for func in self.importer.defer_after_nodes_before_links:
-            func()
-        self.importer.defer_after_nodes_before_links.clear()
-
-        self.import_properties_from_id_list([NODE_TREE_LINKS])
-
+        # the importer might do the nodes piece by piece,
+        # so everything that needs all nodes must be deferred as well
+        # one thing that requires this is the repeat zone,
+        # after pairing more sockets are available for linking
+        self.importer.defer(self.importer.pair_zones, OP_PAIR_ZONES)
+        self.importer.defer(self.importer.assign_node_parents, OP_SET_PARENTS)
+        self.importer.defer(
+            lambda: self.importer.run_phase(PHASE_AFTER_NODES), OP_RUN_PHASE
+        )
+        self.importer.defer(
+            lambda: self.import_properties_from_id_list([NODE_TREE_LINKS])
+        )
         # now that the links exist they won't be removed immediately
-        for func in self.importer.set_auto_remove:
-            func()
-        self.importer.set_auto_remove.clear()
+        self.importer.defer(
+            lambda: self.importer.run_phase(PHASE_AFTER_LINKS), OP_RUN_PHASE
+        )
 
 
 class NodesImporter(SpecificImporter[bpy.types.Nodes]):
@@ -236,7 +384,8 @@ class InterfaceExporter(SpecificExporter[bpy.types.NodeTreeInterface]):
 
 class InterfaceImporter(SpecificImporter[bpy.types.NodeTreeInterface]):
     def deserialize(self):
-        self.getter().clear()
+        interface = self.getter()
+        interface.clear()
 
         def get_type(data: dict):
             item_type = _or_default(data, bpy.types.NodeTreeInterfaceItem, ITEM_TYPE)
@@ -248,52 +397,68 @@ class InterfaceImporter(SpecificImporter[bpy.types.NodeTreeInterface]):
                 f"item_type neither {ITEM_TYPE_SOCKET} nor {ITEM_TYPE_PANEL} but {item_type}"
             )
 
-        for item in self.serialization[ITEMS_TREE][DATA][ITEMS]:
+        items = self.serialization[ITEMS_TREE][DATA][ITEMS]
+
+        # the items are in tree order, so every item's parent is created before it
+        # and an item's position within its parent is the number of siblings before it
+        positions = []
+        children: dict[int, int] = {}
+        for item in items:
+            parent_index = item[DATA].get(PARENT_INDEX)
+            if parent_index is None:
+                positions.append(None)
+                continue
+            positions.append(children.get(parent_index, 0))
+            children[parent_index] = positions[-1] + 1
+
+        # looking them up in items_tree is linear
+        panels: dict[int, bpy.types.NodeTreeInterfacePanel] = {}
+
+        def get_parent(data: dict) -> None | bpy.types.NodeTreeInterfacePanel:
+            if PARENT_INDEX not in data:
+                return None
+            parent_index = data[PARENT_INDEX]
+            assert parent_index in panels, f"no panel at {parent_index} (yet)"
+            return panels[parent_index]
+
+        for i, item in enumerate(items):
             data = item[DATA]
             ty = get_type(data)
             name = _or_default(data, ty, NAME)
             description = _or_default(data, ty, DESCRIPTION)
 
-            def get_parent() -> None | bpy.types.NodeTreeInterfacePanel:
-                if PARENT_INDEX in data:
-                    parent_index = data[PARENT_INDEX]
-                    assert parent_index < len(self.getter().items_tree)
-                    parent = self.getter().items_tree[parent_index]
-                    assert isinstance(parent, bpy.types.NodeTreeInterfacePanel)
-                    return parent
-                else:
-                    return None
-
             if ty == bpy.types.NodeTreeInterfaceSocket:
                 if self.importer.debug_prints:
                     print(
                         f"{self.from_root.to_str()}: adding socket {name}, {data[SOCKET_TYPE]}"
                     )
-                new_item = self.getter().new_socket(
+                new_item = interface.new_socket(
                     name=name,
                     description=description,
                     in_out=_or_default(data, ty, "in_out"),
                     socket_type=data[SOCKET_TYPE],
-                    parent=get_parent(),
+                    parent=get_parent(data),
                 )
                 if isinstance(new_item, bpy.types.NodeTreeInterfaceSocketBool):
                     new_item.is_panel_toggle = data[IS_PANEL_TOGGLE]
             else:
                 if self.importer.debug_prints:
                     print(f"{self.from_root.to_str()}: adding panel {name}")
-                new_item = self.getter().new_panel(
+                new_item = interface.new_panel(
                     name=name,
                     description=description,
                     default_closed=_or_default(data, ty, DEFAULT_CLOSED),
                 )
-                parent = get_parent()
+                parent = get_parent(data)
                 if parent is not None:
-                    self.getter().move_to_parent(
+                    interface.move_to_parent(
                         item=new_item,
                         parent=parent,
-                        to_position=len(parent.interface_items),
+                        to_position=positions[i],
                     )
+                panels[i] = new_item
 
+        self.importer.structure_changed()
         self.import_all_simple_writable_properties_and_list([ITEMS_TREE])
 
 
@@ -333,6 +498,7 @@ class TreeSocketImporter(SpecificImporter[bpy.types.NodeTreeInterfaceSocket]):
                 )
             dimensions = self.serialization[DIMENSIONS]
             self.getter().dimensions = dimensions  # ty: ignore[invalid-assignment]
+            self.importer.structure_changed()
 
         # importing the socket type resets the dimension!
         self.import_all_simple_writable_properties([SOCKET_TYPE])
@@ -353,10 +519,7 @@ class NodeExporter(SpecificExporter[bpy.types.Node]):
 
 class NodeImporter(SpecificImporter[bpy.types.Node]):
     def deserialize(self):
-        # this is the case for many node types that would otherwise need a specific handler
-        if DATA_TYPE in self.serialization:
-            self.import_properties_from_id_list([DATA_TYPE])
-
+        # properties like data_type are written before this, see TYPE_DETERMINING
         self.import_all_simple_writable_properties_and_list([INPUTS, OUTPUTS])
         _import_node_parent(self)
 
@@ -433,6 +596,7 @@ class SocketImporter(SpecificImporter[bpy.types.NodeSocket]):
                 )
             dimensions = self.serialization[DIMENSIONS]
             self.getter().dimensions = dimensions  # ty: ignore[invalid-assignment]
+            self.importer.structure_changed()
             if DEFAULT_VALUE in self.serialization:
                 default_value = self.serialization[DEFAULT_VALUE]
                 if len(default_value) > dimensions:
@@ -459,75 +623,111 @@ class LinkExporter(SpecificExporter[bpy.types.NodeLink]):
         )
 
 
+def _socket_slot(getter: GETTER, tree_getter: GETTER | None) -> tuple[int, str, int] | None:
+    # sockets of the tree's nodes have paths like tree.nodes[i].inputs[j]
+    if not isinstance(getter, GetterPath) or getter.index_ is None:
+        return None
+    side = getter.parent
+    if side is None or side.attr not in (INPUTS, OUTPUTS) or side.parent is None:
+        return None
+    node_index = side.parent.position_in(tree_getter, NODE_TREE_NODES)  # ty: ignore[invalid-argument-type]
+    if node_index is None:
+        return None
+    return node_index, side.attr, getter.index_
+
+
+class _SocketIndex:
+    """Live sockets by their serialized ID.
+    The nodes and each node's sockets are listed once,
+    instead of indexing the linear collections for every link."""
+
+    def __init__(self, importer: Importer) -> None:
+        self.importer = importer
+        self.tree_getter = importer.current_tree_getter
+        self.nodes: list[bpy.types.Node] | None = None
+        self.sockets: dict[tuple[int, str], list[bpy.types.NodeSocket]] = {}
+
+    def socket(self, ident: int) -> bpy.types.NodeSocket:
+        assert ident in self.importer.getters, (
+            f"Socket with Id {ident} not deserialized yet"
+        )
+        getter = self.importer.getters[ident]
+
+        slot = _socket_slot(getter, self.tree_getter)
+        if slot is None:
+            return getter()  # ty: ignore[invalid-return-type]
+        node_index, side, socket_index = slot
+
+        sockets = self.sockets.get((node_index, side))
+        if sockets is None:
+            if self.nodes is None:
+                self.nodes = list(self.tree_getter().nodes)  # ty: ignore[unresolved-attribute, call-non-callable]
+            sockets = list(getattr(self.nodes[node_index], side))
+            self.sockets[(node_index, side)] = sockets
+        return sockets[socket_index]
+
+
+def _sort_multi_input_links(
+    links: list[bpy.types.NodeLink], targets: list[int], from_root: FromRoot
+) -> None:
+    # the links of one socket are a permutation of the sort ids,
+    # every swap puts one link into its final place, so each cycle takes one swap less than its length
+    current = [link.multi_input_sort_id for link in links]
+    by_sort_id = {sort_id: i for i, sort_id in enumerate(current)}
+    for i, target in enumerate(targets):
+        while current[i] != target:
+            other = by_sort_id.get(target)
+            if other is None:
+                raise RuntimeError(
+                    f"{from_root.to_str()}: no link is occupying sort id {target}"
+                )
+            links[i].swap_multi_input_sort_id(links[other])
+            current[i], current[other] = current[other], current[i]
+            by_sort_id[current[i]] = i
+            by_sort_id[current[other]] = other
+
+
 class LinksImporter(SpecificImporter[bpy.types.NodeLinks]):
     def deserialize(self):
-        multi_links = []
-        for i, link in enumerate(self.serialization[ITEMS]):
+        links = self.getter()
+        socket_index = _SocketIndex(self.importer)
+
+        # the links into each multi input socket, with the sort ids they need
+        multi_links: dict[int, tuple[list[bpy.types.NodeLink], list[int]]] = {}
+        for link in self.serialization[ITEMS]:
             data = link[DATA]
-            from_socket_id = data[FROM_SOCKET]
             to_socket_id = data[TO_SOCKET]
 
-            assert from_socket_id in self.importer.getters, (
-                f"Socket with Id {from_socket_id} not deserialized yet"
-            )
-            assert to_socket_id in self.importer.getters, (
-                f"Socket with Id {to_socket_id} not deserialized yet"
-            )
-
-            from_socket = self.importer.getters[from_socket_id]()
-            to_socket = self.importer.getters[to_socket_id]()
+            from_socket = socket_index.socket(data[FROM_SOCKET])
+            to_socket = socket_index.socket(to_socket_id)
 
             assert isinstance(from_socket, bpy.types.NodeSocket)
             assert isinstance(to_socket, bpy.types.NodeSocket)
 
-            from_node = from_socket.node
             to_node = to_socket.node
 
             if self.importer.debug_prints:
                 print(
-                    f"{self.from_root.to_str()}: linking {from_node.name}, {from_socket.identifier} to {to_node.name}, {to_socket.identifier}"  # ty:ignore[possibly-missing-attribute]
+                    f"{self.from_root.to_str()}: linking {from_socket.node.name}, {from_socket.identifier} to {to_node.name}, {to_socket.identifier}"  # ty:ignore[possibly-missing-attribute]
                 )
 
-            self.getter().new(input=from_socket, output=to_socket)
+            new_link = links.new(input=from_socket, output=to_socket)
 
             if isinstance(to_node, bpy.types.NodeReroute):
                 continue
             if not to_socket.is_multi_input:
                 continue
 
-            multi_links.append(i)
-
-        if self.importer.debug_prints:
-            print(f"{self.from_root.to_str()}: multilinks are {multi_links}")
-
-        for i in multi_links:
-            link = self.getter()[i]
-            multi_input_sort_id = self.serialization[ITEMS][i][DATA][
-                MULTI_INPUT_SORT_ID
-            ]
+            socket_links, targets = multi_links.setdefault(to_socket_id, ([], []))
+            socket_links.append(new_link)
+            targets.append(data[MULTI_INPUT_SORT_ID])
 
+        for to_socket_id, (socket_links, targets) in multi_links.items():
             if self.importer.debug_prints:
                 print(
-                    f"{self.from_root.to_str()}: putting link {i} in the correct place: {multi_input_sort_id}"
+                    f"{self.from_root.to_str()}: putting links into {to_socket_id} in the correct places: {targets}"
                 )
-
-            if link.multi_input_sort_id == multi_input_sort_id:
-                continue
-
-            other = next(
-                (
-                    other
-                    for other in link.to_socket.links
-                    if other.multi_input_sort_id == multi_input_sort_id
-                ),
-                None,
-            )
-            if other is None:
-                raise RuntimeError(
-                    f"No link is occupying sort id {multi_input_sort_id}"
-                )
-
-            link.swap_multi_input_sort_id(other)
+            _sort_multi_input_links(socket_links, targets, self.from_root)
 
 
 class LinkImporter(SpecificImporter[bpy.types.NodeLink]):
@@ -554,12 +754,15 @@ class MenuSwitchImporter(SpecificImporter[bpy.types.GeometryNodeMenuSwitch]):
 
 class MenuSwitchItemsImporter(SpecificImporter[bpy.types.NodeMenuSwitchItems]):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            name = _or_default(item[DATA], bpy.types.NodeEnumItem, NAME)
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding item {name}")
-            self.getter().new(name=name)
+        _sync_collection(
+            self,
+            wanted=[
+                (_or_default(item[DATA], bpy.types.NodeEnumItem, NAME),)
+                for item in self.serialization[ITEMS]
+            ],
+            key_of=lambda item: (item.name,),
+            new=lambda collection, key: collection.new(name=key[0]),
+        )
 
 
 class SwitchImporter(SpecificImporter[bpy.types.GeometryNodeSwitch]):
@@ -592,17 +795,12 @@ class CaptureAttrItemsImporter(
     SpecificImporter[bpy.types.NodeGeometryCaptureAttributeItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            name = _or_default(item[DATA], bpy.types.NodeEnumItem, NAME)
-            socket_type = _map_attribute_type_to_socket_type(
-                _or_default(
-                    item[DATA], bpy.types.NodeGeometryCaptureAttributeItem, DATA_TYPE
-                )
-            )
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding item {name} {socket_type}")
-            self.getter().new(socket_type=socket_type, name=name)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.NodeGeometryCaptureAttributeItem,
+            type_identifier=DATA_TYPE,
+            to_socket_type=_map_attribute_type_to_socket_type,
+        )
 
 
 class RepeatInputExporter(SpecificExporter[bpy.types.GeometryNodeRepeatInput]):
@@ -628,18 +826,14 @@ class RepeatInputImporter(SpecificImporter[bpy.types.GeometryNodeRepeatInput]):
         # if this fails it's easier to debug here
         output = self.serialization[PAIRED_OUTPUT]
 
-        def deferred():
-            if not self.getter().pair_with_output(
-                self.importer.current_tree.nodes[output]  # ty:ignore[possibly-missing-attribute]
-            ):
-                raise RuntimeError(
-                    f"{self.from_root.to_str()}: failed to pair with {output}"
-                )
-            self.import_properties_from_id_list([INPUTS, OUTPUTS])
-
         # defer connection until we've created the output node
         # only then, import the sockets
-        self.importer.defer_after_nodes_before_links.append(deferred)
+        self.importer.defer_zone_pairing(
+            getter=self.getter,
+            output=output,
+            then=lambda: self.import_properties_from_id_list([INPUTS, OUTPUTS]),
+            from_root=self.from_root,
+        )
         _import_node_parent(self)
 
 
@@ -664,13 +858,7 @@ class RepeatOutputItemsImporter(
     SpecificImporter[bpy.types.NodeGeometryRepeatOutputItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            name = _or_default(item[DATA], bpy.types.NodeEnumItem, NAME)
-            socket_type = _or_default(item[DATA], bpy.types.RepeatItem, SOCKET_TYPE)
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding item {name} {socket_type}")
-            self.getter().new(socket_type=socket_type, name=name)
+        _sync_socket_items(self, item_type=bpy.types.RepeatItem)
 
 
 class IndexSwitchImporter(SpecificImporter[bpy.types.GeometryNodeIndexSwitch]):
@@ -690,11 +878,13 @@ class IndexItemExporter(SpecificExporter[bpy.types.IndexSwitchItem]):
 
 class IndexItemsImporter(SpecificImporter[bpy.types.NodeIndexSwitchItems]):
     def deserialize(self):
-        self.getter().clear()
-        for _ in self.serialization[ITEMS]:
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding index")
-            self.getter().new()
+        # the items only differ in their position
+        _sync_collection(
+            self,
+            wanted=[() for _ in self.serialization[ITEMS]],
+            key_of=lambda item: (),
+            new=lambda collection, key: collection.new(),
+        )
 
 
 class ViewerSpecificExporter(SpecificExporter[bpy.types.GeometryNodeViewer]):
@@ -716,18 +906,7 @@ class ViewerImporter(SpecificImporter[bpy.types.GeometryNodeViewer]):
 
 class ViewerItemsImporter(SpecificImporter[bpy.types.NodeGeometryViewerItems]):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            data = item[DATA]
-            name = _or_default(data, bpy.types.NodeGeometryViewerItem, NAME)
-            socket_type = _or_default(
-                data, bpy.types.NodeGeometryViewerItem, SOCKET_TYPE
-            )
-
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding item {name} {socket_type}")
-
-            self.getter().new(socket_type=socket_type, name=name)
+        _sync_socket_items(self, item_type=bpy.types.NodeGeometryViewerItem)
 
 
 class ViewerItemImporter(SpecificImporter[bpy.types.NodeGeometryViewerItem]):
@@ -741,7 +920,7 @@ class ViewerItemImporter(SpecificImporter[bpy.types.NodeGeometryViewerItem]):
 
         # very, very important to not set auto_remove to true before the links are established
         # especially while iterating over more properties of it
-        self.importer.set_auto_remove.append(deferred)
+        self.importer.defer_to_phase(PHASE_AFTER_LINKS, deferred, OP_SET_AUTO_REMOVE)
 
 
 class ColorRampElementExporter(SpecificExporter[bpy.types.ColorRampElement]):
@@ -760,16 +939,25 @@ class ColorRampElementsImporter(SpecificImporter[bpy.types.ColorRampElements]):
 color ramps need at least one element"""
             )
 
-        # this will probably not happen
-        while len(self.getter()) > number_needed:
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: removing element")
-            self.getter().remove(self.getter()[-1])
-
-        while len(self.getter()) < number_needed:
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding element")
-            self.getter().new(position=0)
+        # the elements sort themselves by position, so any matching one can stay
+        # there is always one left, and never more than 32
+        elements = self.getter()
+        kept, removed, created = _sync_items(
+            existing=list(elements),
+            wanted=[
+                (_or_default(item[DATA], bpy.types.ColorRampElement, POSITION),)
+                for item in self.serialization[ITEMS]
+            ],
+            key_of=lambda element: (element.position,),
+            remove=elements.remove,
+            new=lambda key: elements.new(position=key[0]),
+            ordered=False,
+            keep_one=True,
+        )
+        if self.importer.debug_prints:
+            print(
+                f"{self.from_root.to_str()}: kept {kept}, removed {removed}, created {created}"
+            )
 
 
 class SimulationInputExporter(SpecificExporter[bpy.types.GeometryNodeSimulationInput]):
@@ -795,18 +983,14 @@ class SimulationInputImporter(SpecificImporter[bpy.types.GeometryNodeSimulationI
         # if this fails it's easier to debug here
         output = self.serialization[PAIRED_OUTPUT]
 
-        def deferred():
-            if not self.getter().pair_with_output(
-                self.importer.current_tree.nodes[output]  # ty:ignore[possibly-missing-attribute]
-            ):
-                raise RuntimeError(
-                    f"{self.from_root.to_str()}: failed to pair with {output}"
-                )
-            self.import_properties_from_id_list([INPUTS, OUTPUTS])
-
         # defer connection until we've created the output node
         # only then, import the sockets
-        self.importer.defer_after_nodes_before_links.append(deferred)
+        self.importer.defer_zone_pairing(
+            getter=self.getter,
+            output=output,
+            then=lambda: self.import_properties_from_id_list([INPUTS, OUTPUTS]),
+            from_root=self.from_root,
+        )
         _import_node_parent(self)
 
 
@@ -835,15 +1019,7 @@ class SimulationOutputItemsImporter(
     SpecificImporter[bpy.types.NodeGeometrySimulationOutputItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            name = _or_default(item[DATA], bpy.types.SimulationStateItem, NAME)
-            socket_type = _or_default(
-                item[DATA], bpy.types.SimulationStateItem, SOCKET_TYPE
-            )
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding item {name} {socket_type}")
-            self.getter().new(socket_type=socket_type, name=name)
+        _sync_socket_items(self, item_type=bpy.types.SimulationStateItem)
 
 
 class NodeClosureInputExporter(SpecificExporter[bpy.types.NodeClosureInput]):
@@ -869,18 +1045,14 @@ class NodeClosureInputImporter(SpecificImporter[bpy.types.NodeClosureInput]):
         # if this fails it's easier to debug here
         output = self.serialization[PAIRED_OUTPUT]
 
-        def deferred():
-            if not self.getter().pair_with_output(
-                self.importer.current_tree.nodes[output]  # ty:ignore[possibly-missing-attribute]
-            ):
-                raise RuntimeError(
-                    f"{self.from_root.to_str()}: failed to pair with {output}"
-                )
-            self.import_properties_from_id_list([INPUTS, OUTPUTS])
-
         # defer connection until we've created the output node
         # only then, import the sockets
-        self.importer.defer_after_nodes_before_links.append(deferred)
+        self.importer.defer_zone_pairing(
+            getter=self.getter,
+            output=output,
+            then=lambda: self.import_properties_from_id_list([INPUTS, OUTPUTS]),
+            from_root=self.from_root,
+        )
         _import_node_parent(self)
 
 
@@ -910,28 +1082,12 @@ class NodeClosureOutputImporter(SpecificImporter[bpy.types.NodeClosureOutput]):
 
 class NodeClosureInputItems(SpecificImporter[bpy.types.NodeClosureInputItems]):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            name = _or_default(item[DATA], bpy.types.NodeClosureInputItem, NAME)
-            socket_type = _or_default(
-                item[DATA], bpy.types.NodeClosureInputItem, SOCKET_TYPE
-            )
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding item {name} {socket_type}")
-            self.getter().new(socket_type=socket_type, name=name)
+        _sync_socket_items(self, item_type=bpy.types.NodeClosureInputItem)
 
 
 class NodeClosureOutputItems(SpecificImporter[bpy.types.NodeClosureOutputItems]):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            name = _or_default(item[DATA], bpy.types.NodeClosureOutputItem, NAME)
-            socket_type = _or_default(
-                item[DATA], bpy.types.NodeClosureOutputItem, SOCKET_TYPE
-            )
-            if self.importer.debug_prints:
-                print(f"{self.from_root.to_str()}: adding item {name} {socket_type}")
-            self.getter().new(socket_type=socket_type, name=name)
+        _sync_socket_items(self, item_type=bpy.types.NodeClosureOutputItem)
 
 
 class RerouteExporter(SpecificExporter[bpy.types.NodeReroute]):
@@ -968,11 +1124,15 @@ class RerouteImporter(SpecificImporter[bpy.types.NodeReroute]):
 
         self.importer.register_as_deserialized(
             ident=self.serialization[SINGLE_INPUT],
-            getter=lambda: self.getter().inputs[0],
+            getter=self.importer.getter_path(self.getter)
+            .attribute(INPUTS)
+            .index(0),
         )
         self.importer.register_as_deserialized(
             ident=self.serialization[SINGLE_OUTPUT],
-            getter=lambda: self.getter().outputs[0],
+            getter=self.importer.getter_path(self.getter)
+            .attribute(OUTPUTS)
+            .index(0),
         )
 
 
@@ -989,11 +1149,20 @@ and there are always at least two points.
 We remove all but two and skip first and last from the serialization."""
 
     def deserialize(self):
-        while len(self.getter()) > 2:
-            self.getter().remove(point=self.getter()[1])
-        for item in self.serialization[ITEMS][1:-1]:
-            location = item[DATA][LOCATION]
-            self.getter().new(position=location[0], value=location[1])
+        # the points sort themselves by position, so any matching one in between can stay
+        points = self.getter()
+        kept, removed, created = _sync_items(
+            existing=list(points)[1:-1],
+            wanted=[tuple(item[DATA][LOCATION]) for item in self.serialization[ITEMS][1:-1]],
+            key_of=lambda point: tuple(point.location),
+            remove=lambda point: points.remove(point=point),
+            new=lambda key: points.new(position=key[0], value=key[1]),
+            ordered=False,
+        )
+        if self.importer.debug_prints:
+            print(
+                f"{self.from_root.to_str()}: kept {kept}, removed {removed}, created {created}"
+            )
 
 
 class CurveMappingImporter(SpecificImporter[bpy.types.CurveMapping]):
@@ -1005,7 +1174,11 @@ class CurveMappingImporter(SpecificImporter[bpy.types.CurveMapping]):
         def deferred():
             self.getter().update()
 
-        self.importer.defer_after_nodes_before_links.append(deferred)
+        # the points might only get their values at the very end
+        if self.importer.structure_first:
+            self.importer.defer_to_phase(PHASE_FILL, deferred, OP_UPDATE_CURVE)
+        else:
+            self.importer.defer_to_phase(PHASE_AFTER_NODES, deferred, OP_UPDATE_CURVE)
 
 
 class ConvertToDisplayImporter(
@@ -1057,11 +1230,10 @@ class EvalClosureInputItemsImporter(
     SpecificImporter[bpy.types.NodeEvaluateClosureInputItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.NodeEvaluateClosureInputItem,
+        )
 
 
 class EvalClosureOutputItemExporter(
@@ -1077,11 +1249,10 @@ class EvalClosureOutputItemsImporter(
     SpecificImporter[bpy.types.NodeEvaluateClosureOutputItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.NodeEvaluateClosureOutputItem,
+        )
 
 
 class FormatStringNodeImporter(SpecificImporter[bpy.types.FunctionNodeFormatString]):
@@ -1104,11 +1275,10 @@ class FormatStringItemsImporter(
     SpecificImporter[bpy.types.NodeFunctionFormatStringItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.NodeFunctionFormatStringItem,
+        )
 
 
 class CombineBundleImporter(SpecificImporter[bpy.types.NodeCombineBundle]):
@@ -1127,11 +1297,10 @@ class CombineBundleItemExporter(SpecificExporter[bpy.types.NodeCombineBundleItem
 
 class CombineBundleItemsImporter(SpecificImporter[bpy.types.NodeCombineBundleItems]):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.NodeCombineBundleItem,
+        )
 
 
 class SeparateBundleImporter(SpecificImporter[bpy.types.NodeSeparateBundle]):
@@ -1150,11 +1319,10 @@ class SeparateBundleItemExporter(SpecificExporter[bpy.types.NodeSeparateBundleIt
 
 class SeparateBundleItemsImporter(SpecificImporter[bpy.types.NodeSeparateBundleItems]):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.NodeSeparateBundleItem,
+        )
 
 
 class RenderLayersExporter(SpecificExporter[bpy.types.CompositorNodeRLayers]):
@@ -1182,7 +1350,7 @@ class RenderLayersExporter(SpecificExporter[bpy.types.CompositorNodeRLayers]):
         output_items = []
         other_disabled_should_follow = False
         for i, output_item in enumerate(self.obj.outputs):
-            from_root_socket = self.from_root.add(f"[{i}] ({output_item.name})")
+            from_root_socket = self.from_root.add_item(i, output_item)
 
             if output_item.enabled:
                 assert not other_disabled_should_follow, (
@@ -1232,16 +1400,16 @@ class RenderLayersImporter(SpecificImporter[bpy.types.CompositorNodeRLayers]):
 
         # the rest is basically the same as in normal collection importing
 
-        def make_getter(i: int) -> GETTER:
-            return lambda: getattr(self.getter(), OUTPUTS)[i]
-
+        items_pass = ItemsPass(
+            self.importer.getter_path(self.getter).attribute(OUTPUTS)
+        )
         for i, item in enumerate(serialized_outputs):
-            name = item.get(NAME, "unnamed")
             self.importer._import_obj(
-                getter=make_getter(i),
-                serialization=serialized_outputs[i],
-                from_root=self.from_root.add(f"[{i}] ({name})"),
+                getter=items_pass.item_getter(i),
+                serialization=item,
+                from_root=self.from_root.add_item(i, item),
             )
+        items_pass.end()
 
 
 class ForEachInputExporter(
@@ -1271,18 +1439,14 @@ class ForEachInputImporter(
         # if this fails it's easier to debug here
         output = self.serialization[PAIRED_OUTPUT]
 
-        def deferred():
-            if not self.getter().pair_with_output(
-                self.importer.current_tree.nodes[output]  # ty:ignore[possibly-missing-attribute]
-            ):
-                raise RuntimeError(
-                    f"{self.from_root.to_str()}: failed to pair with {output}"
-                )
-            self.import_properties_from_id_list([INPUTS, OUTPUTS])
-
         # defer connection until we've created the output node
         # only then, import the sockets
-        self.importer.defer_after_nodes_before_links.append(deferred)
+        self.importer.defer_zone_pairing(
+            getter=self.getter,
+            output=output,
+            then=lambda: self.import_properties_from_id_list([INPUTS, OUTPUTS]),
+            from_root=self.from_root,
+        )
         _import_node_parent(self)
 
 
@@ -1317,11 +1481,10 @@ class GenerationItemsImporter(
     SpecificImporter[bpy.types.NodeGeometryForeachGeometryElementGenerationItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.ForeachGeometryElementGenerationItem,
+        )
 
 
 class InputItemExporter(SpecificExporter[bpy.types.ForeachGeometryElementInputItem]):
@@ -1333,11 +1496,10 @@ class InputItemsImporter(
     SpecificImporter[bpy.types.NodeGeometryForeachGeometryElementInputItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.ForeachGeometryElementInputItem,
+        )
 
 
 class MainItemExporter(SpecificExporter[bpy.types.ForeachGeometryElementMainItem]):
@@ -1349,11 +1511,10 @@ class MainItemsImporter(
     SpecificImporter[bpy.types.NodeGeometryForeachGeometryElementMainItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.ForeachGeometryElementMainItem,
+        )
 
 
 class BakeExporter(SpecificExporter[bpy.types.GeometryNodeBake]):
@@ -1383,11 +1544,10 @@ class BakeItemExporter(SpecificExporter[bpy.types.NodeGeometryBakeItem]):
 
 class BackeItemsImporter(SpecificImporter[bpy.types.NodeGeometryBakeItems]):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.NodeGeometryBakeItem,
+        )
 
 
 class FieldToGridExporter(SpecificExporter[bpy.types.GeometryNodeFieldToGrid]):
@@ -1420,11 +1580,11 @@ class FieldToGridItemsImporter(
     SpecificImporter[bpy.types.GeometryNodeFieldToGridItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][DATA_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.GeometryNodeFieldToGridItem,
+            type_identifier=DATA_TYPE,
+        )
 
 
 class FileOutputImporter(SpecificImporter[bpy.types.CompositorNodeOutputFile]):
@@ -1445,11 +1605,10 @@ class FileOutputItmesImporter(
     SpecificImporter[bpy.types.NodeCompositorFileOutputItems]
 ):
     def deserialize(self):
-        self.getter().clear()
-        for item in self.serialization[ITEMS]:
-            socket_type = item[DATA][SOCKET_TYPE]
-            name = item[DATA][NAME]
-            self.getter().new(name=name, socket_type=socket_type)
+        _sync_socket_items(
+            self,
+            item_type=bpy.types.NodeCompositorFileOutputItem,
+        )
 
 
 class SetMeshNormalImporter(SpecificImporter[bpy.types.GeometryNodeSetMeshNormal]):
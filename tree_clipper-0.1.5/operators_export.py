@@ -15,7 +15,11 @@ from ._vendor.tree_clipper.specific_handlers import (
 )
 from ._vendor.tree_clipper.export_nodes import ExportParameters, ExportIntermediate
 
-from .preferences import get_max_clipboard_bytes, get_show_advanced_options
+from .preferences import (
+    get_max_clipboard_bytes,
+    get_show_advanced_options,
+    get_step_budget_ms,
+)
 
 _INTERMEDIATE_EXPORT_CACHE = None
 
@@ -32,6 +36,16 @@ class SCENE_OT_Tree_Clipper_Export_Prepare(bpy.types.Operator):
     debug_prints: bpy.props.BoolProperty(name="Debug on Console", default=False)  # type: ignore
     write_from_roots: bpy.props.BoolProperty(name="Add Paths", default=False)  # type: ignore
 
+    # for huge exports, the trees are written as soon as they're done instead of kept in memory
+    stream_to_file: bpy.props.BoolProperty(name="Stream to File", default=False)  # type: ignore
+    stream_file: bpy.props.StringProperty(
+        name="Output File",
+        default=DEFAULT_FILE,
+        subtype="FILE_PATH",
+    )  # type: ignore
+    stream_compress: bpy.props.BoolProperty(name="Compress", default=True)  # type: ignore
+    stream_json_indent: bpy.props.IntProperty(name="JSON Indent", default=4, min=0)  # type: ignore
+
     def invoke(
         self, context: bpy.types.Context, event: bpy.types.Event
     ) -> set["rna_enums.OperatorReturnItems"]:
@@ -54,6 +68,12 @@ class SCENE_OT_Tree_Clipper_Export_Prepare(bpy.types.Operator):
                 write_from_roots=self.write_from_roots,
             )
         )
+        if self.stream_to_file:
+            _INTERMEDIATE_EXPORT_CACHE.stream_to_file(
+                file_path=Path(self.stream_file),
+                compress=self.stream_compress,
+                json_indent=self.stream_json_indent,
+            )
 
         # seems impossible to use bl_idname here
         bpy.ops.scene.tree_clipper_export_modal("INVOKE_DEFAULT")  # ty: ignore[unresolved-attribute]
@@ -67,6 +87,14 @@ class SCENE_OT_Tree_Clipper_Export_Prepare(bpy.types.Operator):
         self.layout.prop(self, "export_sub_trees")  # ty:ignore[possibly-missing-attribute]
         self.layout.prop(self, "debug_prints")  # ty:ignore[possibly-missing-attribute]
         self.layout.prop(self, "write_from_roots")  # ty:ignore[possibly-missing-attribute]
+        self.layout.prop(self, "stream_to_file")  # ty:ignore[possibly-missing-attribute]
+        stream_col = self.layout.column()  # ty:ignore[possibly-missing-attribute]
+        stream_col.prop(self, "stream_file")
+        stream_col.prop(self, "stream_compress")
+        indent_row = stream_col.row()
+        indent_row.prop(self, "stream_json_indent")
+        indent_row.enabled = not self.stream_compress
+        stream_col.enabled = self.stream_to_file
 
 
 class SCENE_OT_Tree_Clipper_Export_Modal(bpy.types.Operator):
@@ -92,16 +120,26 @@ class SCENE_OT_Tree_Clipper_Export_Modal(bpy.types.Operator):
 
         if event.type in {"RIGHTMOUSE", "ESC"}:
             context.window_manager.event_timer_remove(self._timer)
+            context.window_manager.progress_end()
+            context.workspace.status_text_set(None)
+            _INTERMEDIATE_EXPORT_CACHE.close_stream()
             _INTERMEDIATE_EXPORT_CACHE = None
             return {"CANCELLED"}
 
-        if _INTERMEDIATE_EXPORT_CACHE.step():
+        # other events only get swallowed, the trees must not change while we export
+        if event.type != "TIMER":
+            return {"RUNNING_MODAL"}
+
+        if _INTERMEDIATE_EXPORT_CACHE.step(get_step_budget_ms()):
             context.window_manager.progress_update(
                 _INTERMEDIATE_EXPORT_CACHE.progress()
             )
+            context.workspace.status_text_set(_INTERMEDIATE_EXPORT_CACHE.status())
             return {"RUNNING_MODAL"}
 
+        context.window_manager.event_timer_remove(self._timer)
         context.window_manager.progress_end()
+        context.workspace.status_text_set(None)
         report = _INTERMEDIATE_EXPORT_CACHE.exporter.report
         self.report(
             {"INFO"},
@@ -192,7 +230,9 @@ class SCENE_OT_Tree_Clipper_Export_Cache(bpy.types.Operator):
             for external_item in self.external_items
             if not external_item.skip
         )
-        if clipboard:
+        if _INTERMEDIATE_EXPORT_CACHE.is_streaming():
+            _INTERMEDIATE_EXPORT_CACHE.end_stream()
+        elif clipboard:
             string = _INTERMEDIATE_EXPORT_CACHE.export_to_str(
                 compress=compress,
                 json_indent=self.json_indent,
@@ -215,7 +255,18 @@ class SCENE_OT_Tree_Clipper_Export_Cache(bpy.types.Operator):
         _INTERMEDIATE_EXPORT_CACHE = None
         return {"FINISHED"}
 
+    def cancel(self, context: bpy.types.Context) -> None:
+        # the dialog was dismissed, don't leave a partial file behind
+        if isinstance(_INTERMEDIATE_EXPORT_CACHE, ExportIntermediate):
+            _INTERMEDIATE_EXPORT_CACHE.close_stream()
+
     def draw(self, context: bpy.types.Context) -> None:
+        assert isinstance(_INTERMEDIATE_EXPORT_CACHE, ExportIntermediate)
+        if _INTERMEDIATE_EXPORT_CACHE.is_streaming():
+            # where and how to write was decided before the export
+            self._draw_external_items()
+            return
+
         self.layout.prop(self, "clipboard_or_file", expand=True)  # ty:ignore[possibly-missing-attribute]
         clipboard = self.clipboard_or_file == _CLIPBOARD
 
@@ -230,6 +281,9 @@ class SCENE_OT_Tree_Clipper_Export_Cache(bpy.types.Operator):
         json_col.prop(self, "json_indent")  # ty:ignore[possibly-missing-attribute]
         json_col.enabled = not compress
 
+        self._draw_external_items()
+
+    def _draw_external_items(self) -> None:
         if len(self.external_items) == 0:
             return
 
@@ -18,12 +18,19 @@ from ._vendor.tree_clipper.specific_handlers import (
 from ._vendor.tree_clipper.import_nodes import ImportParameters, ImportIntermediate
 
 from .post_import import post_import
-from .preferences import get_show_advanced_options
+from .preferences import get_show_advanced_options, get_step_budget_ms
 
 _INTERMEDIATE_IMPORT_CACHE = None
 TIMER = None
 
 
+def _is_loading() -> bool:
+    return (
+        isinstance(_INTERMEDIATE_IMPORT_CACHE, ImportIntermediate)
+        and _INTERMEDIATE_IMPORT_CACHE.loading is not None
+    )
+
+
 class SCENE_OT_Tree_Clipper_Import_File_Prepare(bpy.types.Operator):
     bl_idname = "scene.tree_clipper_import_file_prepare"
     bl_label = "Import File"
@@ -44,10 +51,15 @@ class SCENE_OT_Tree_Clipper_Import_File_Prepare(bpy.types.Operator):
         self, context: bpy.types.Context
     ) -> set["rna_enums.OperatorReturnItems"]:
         global _INTERMEDIATE_IMPORT_CACHE
-        _INTERMEDIATE_IMPORT_CACHE = ImportIntermediate(file_path=Path(self.input_file))
+        if _is_loading():
+            self.report({"ERROR"}, "Another import is still reading its data")
+            return {"CANCELLED"}
+        _INTERMEDIATE_IMPORT_CACHE = ImportIntermediate(
+            file_path=Path(self.input_file), lazy=True, background=True
+        )
 
         # seems impossible to use bl_idname here
-        bpy.ops.scene.tree_clipper_import_cache("INVOKE_DEFAULT")  # ty: ignore[unresolved-attribute]
+        bpy.ops.scene.tree_clipper_import_wait("INVOKE_DEFAULT")  # ty: ignore[unresolved-attribute]
         return {"FINISHED"}
 
 
@@ -60,10 +72,92 @@ class SCENE_OT_Tree_Clipper_Import_Clipboard_Prepare(bpy.types.Operator):
         self, context: bpy.types.Context
     ) -> set["rna_enums.OperatorReturnItems"]:
         global _INTERMEDIATE_IMPORT_CACHE
+        if _is_loading():
+            self.report({"ERROR"}, "Another import is still reading its data")
+            return {"CANCELLED"}
         _INTERMEDIATE_IMPORT_CACHE = ImportIntermediate(
-            string=bpy.context.window_manager.clipboard  # ty:ignore[possibly-missing-attribute]
+            string=bpy.context.window_manager.clipboard,  # ty:ignore[possibly-missing-attribute]
+            lazy=True,
+            background=True,
         )
 
+        # seems impossible to use bl_idname here
+        bpy.ops.scene.tree_clipper_import_wait("INVOKE_DEFAULT")  # ty: ignore[unresolved-attribute]
+        return {"FINISHED"}
+
+
+class SCENE_OT_Tree_Clipper_Import_Wait_Cancel(bpy.types.Operator):
+    bl_idname = "scene.tree_clipper_import_wait_cancel"
+    bl_label = "Cancel Import"
+    bl_options = set()
+
+    def execute(
+        self, context: bpy.types.Context
+    ) -> set["rna_enums.OperatorReturnItems"]:
+        global _INTERMEDIATE_IMPORT_CACHE
+        # the worker thread can't be stopped, the waiting modal notices and drops its result
+        if _is_loading():
+            _INTERMEDIATE_IMPORT_CACHE = None
+        return {"FINISHED"}
+
+
+def _draw_wait_status(header: bpy.types.Header, context: bpy.types.Context) -> None:
+    # ESC is left to the rest of Blender, which stays usable while the data is read
+    header.layout.label(text="Reading import data...")  # ty:ignore[possibly-missing-attribute]
+    header.layout.operator(  # ty:ignore[possibly-missing-attribute]
+        SCENE_OT_Tree_Clipper_Import_Wait_Cancel.bl_idname, icon="CANCEL"
+    )
+
+
+class SCENE_OT_Tree_Clipper_Import_Wait(bpy.types.Operator):
+    bl_idname = "scene.tree_clipper_import_wait"
+    bl_label = "Import Wait"
+    bl_options = set()
+
+    _timer = None
+
+    # the import this waits for, the global might be replaced or cleared in the meantime
+    _intermediate: ImportIntermediate | None = None
+
+    def invoke(
+        self, context: bpy.types.Context, event: bpy.types.Event
+    ) -> set["rna_enums.OperatorReturnItems"]:
+        assert isinstance(_INTERMEDIATE_IMPORT_CACHE, ImportIntermediate)
+        self._intermediate = _INTERMEDIATE_IMPORT_CACHE
+        self._timer = context.window_manager.event_timer_add(0.05, window=context.window)  # ty:ignore[possibly-missing-attribute]
+        context.window_manager.modal_handler_add(self)  # ty:ignore[possibly-missing-attribute]
+        context.workspace.status_text_set(_draw_wait_status)  # ty:ignore[possibly-missing-attribute, invalid-argument-type]
+
+        return {"RUNNING_MODAL"}
+
+    def _end(self, context: bpy.types.Context) -> None:
+        context.window_manager.event_timer_remove(self._timer)  # ty:ignore[invalid-argument-type, possibly-missing-attribute]
+        context.workspace.status_text_set(None)  # ty:ignore[possibly-missing-attribute]
+
+    def modal(self, context: bpy.types.Context, event: bpy.types.Event):
+        global _INTERMEDIATE_IMPORT_CACHE
+        assert isinstance(self._intermediate, ImportIntermediate)
+
+        # nothing was created yet, so Blender can be used in the meantime
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+
+        if _INTERMEDIATE_IMPORT_CACHE is not self._intermediate:
+            self._end(context)
+            self.report({"INFO"}, "Import cancelled")
+            return {"CANCELLED"}
+
+        try:
+            loaded = self._intermediate.wait_loaded(0)
+        except Exception:
+            self._end(context)
+            _INTERMEDIATE_IMPORT_CACHE = None
+            raise
+        if not loaded:
+            return {"RUNNING_MODAL"}
+
+        self._end(context)
+
         # seems impossible to use bl_idname here
         bpy.ops.scene.tree_clipper_import_cache("INVOKE_DEFAULT")  # ty: ignore[unresolved-attribute]
         return {"FINISHED"}
@@ -108,6 +202,11 @@ class SCENE_OT_Tree_Clipper_Import_Cache(bpy.types.Operator):
     bl_options = set()
 
     debug_prints: bpy.props.BoolProperty(name="Debug on Console", default=False)  # type: ignore
+    structure_first: bpy.props.BoolProperty(  # type: ignore
+        name="Structure First",
+        description="Create all nodes and links first and fill in their values afterwards",
+        default=False,
+    )
 
     def invoke(
         self, context: bpy.types.Context, event: bpy.types.Event
@@ -162,6 +261,7 @@ class SCENE_OT_Tree_Clipper_Import_Cache(bpy.types.Operator):
             ImportParameters(
                 specific_handlers=BUILT_IN_IMPORTER,
                 debug_prints=self.debug_prints,
+                structure_first=self.structure_first,
             )
         )
 
@@ -180,6 +280,7 @@ class SCENE_OT_Tree_Clipper_Import_Cache(bpy.types.Operator):
 
         if get_show_advanced_options():
             self.layout.prop(self, "debug_prints")  # ty:ignore[possibly-missing-attribute]
+            self.layout.prop(self, "structure_first")  # ty:ignore[possibly-missing-attribute]
 
         if len(context.scene.tree_clipper_external_import_items.items) == 0:
             return
@@ -201,6 +302,9 @@ class SCENE_OT_Tree_Clipper_Import_Modal(bpy.types.Operator):
 
     _timer = None
 
+    # with structure first, the group is added before the values are filled in
+    _attached = False
+
     def invoke(
         self, context: bpy.types.Context, event: bpy.types.Event
     ) -> set["rna_enums.OperatorReturnItems"]:
@@ -217,18 +321,40 @@ class SCENE_OT_Tree_Clipper_Import_Modal(bpy.types.Operator):
 
         if event.type in {"RIGHTMOUSE", "ESC"}:
             context.window_manager.event_timer_remove(self._timer)  # ty:ignore[invalid-argument-type, possibly-missing-attribute]
+            context.window_manager.progress_end()  # ty:ignore[possibly-missing-attribute]
+            context.workspace.status_text_set(None)  # ty:ignore[possibly-missing-attribute]
+            # once attached, the trees are kept, only some values are missing
+            _INTERMEDIATE_IMPORT_CACHE.cancel()
             _INTERMEDIATE_IMPORT_CACHE = None
+            if self._attached:
+                self.report({"WARNING"}, "Import stopped, not all values were filled in")
+            else:
+                self.report({"INFO"}, "Import cancelled")
             return {"FINISHED"}
 
-        if _INTERMEDIATE_IMPORT_CACHE.step():
+        # other events only get swallowed, the trees must not change while we import
+        if event.type != "TIMER":
+            return {"RUNNING_MODAL"}
+
+        if _INTERMEDIATE_IMPORT_CACHE.step(get_step_budget_ms()):
+            if _INTERMEDIATE_IMPORT_CACHE.structure_finished and not self._attached:
+                self._attached = True
+                post_import(
+                    context=context,
+                    event=event,
+                    report=_INTERMEDIATE_IMPORT_CACHE.importer.report,
+                )
             context.window_manager.progress_update(  # ty:ignore[possibly-missing-attribute]
                 _INTERMEDIATE_IMPORT_CACHE.progress()
             )
+            context.workspace.status_text_set(_INTERMEDIATE_IMPORT_CACHE.status())  # ty:ignore[possibly-missing-attribute]
             return {"RUNNING_MODAL"}
 
         self.report({"INFO"}, "--- Import took %s seconds ---" % (time.time() - TIMER))  # ty:ignore[unsupported-operator]
 
+        context.window_manager.event_timer_remove(self._timer)  # ty:ignore[invalid-argument-type, possibly-missing-attribute]
         context.window_manager.progress_end()  # ty:ignore[possibly-missing-attribute]
+        context.workspace.status_text_set(None)  # ty:ignore[possibly-missing-attribute]
         report = _INTERMEDIATE_IMPORT_CACHE.importer.report
 
         if report.rename_material is not None:
@@ -250,6 +376,7 @@ class SCENE_OT_Tree_Clipper_Import_Modal(bpy.types.Operator):
 
         _INTERMEDIATE_IMPORT_CACHE = None
 
-        post_import(context=context, event=event, report=report)
+        if not self._attached:
+            post_import(context=context, event=event, report=report)
 
         return {"FINISHED"}
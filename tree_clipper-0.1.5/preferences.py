@@ -21,9 +21,21 @@ The default value is somewhat conservative, but not guaranteed to be safe.""",
         default=False,
     )  # type: ignore
 
+    step_budget_ms: bpy.props.IntProperty(
+        name="Time per Step (ms)",
+        description="""How long to work on an export or import before Blender gets to redraw.
+
+Lower values keep the UI more responsive,
+higher values finish a bit faster.""",
+        default=50,
+        min=1,
+        max=1000,
+    )  # type: ignore
+
     def draw(self, context: bpy.types.Context) -> None:
         self.layout.prop(self, "max_clipboard_megabyte")
         self.layout.prop(self, "show_advanced_options")
+        self.layout.prop(self, "step_budget_ms")
 
 
 def get_max_clipboard_bytes():
@@ -39,3 +51,9 @@ def get_show_advanced_options():
     return bpy.context.preferences.addons.get(  # ty:ignore[possibly-missing-attribute]
         __package__  # ty:ignore[invalid-argument-type]
     ).preferences.show_advanced_options  # ty:ignore[possibly-missing-attribute]
+
+
+def get_step_budget_ms():
+    return bpy.context.preferences.addons.get(  # ty:ignore[possibly-missing-attribute]
+        __package__  # ty:ignore[invalid-argument-type]
+    ).preferences.step_budget_ms  # ty:ignore[possibly-missing-attribute]